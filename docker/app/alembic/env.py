@@ -2,17 +2,20 @@ from logging.config import fileConfig
 from sqlalchemy import create_engine, pool
 from alembic import context
 from db import Base
-from wait_for_db import DATABASE_URL
 import models
 import os
 
+# Final URL as resolved by wait_for_db (exported to the env in-process or via /tmp/db_env.sh)
+DATABASE_URL = os.getenv("DATABASE_URL")
+
 # Alembic config object
 config = context.config
 config.set_main_option("sqlalchemy.url", DATABASE_URL)
 
 # Set up Python logging from config file
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    # Keep the app's loggers alive when migrations run inside bootstrap.py
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 # MetaData object for autogenerate support
 target_metadata = Base.metadata
@@ -0,0 +1,39 @@
+"""preference (user_id, city) unique index
+
+Revision ID: 4c1f2a7d9b3e
+Revises: 963eb932bdd4
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1f2a7d9b3e'
+down_revision: Union[str, Sequence[str], None] = '963eb932bdd4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Primary keys are already indexed
+    op.drop_index('ix_preferences_id', table_name='preferences')
+    op.drop_index('ix_weatherusers_id', table_name='weatherusers')
+
+    # Keep the newest row of every (user_id, city) duplicate
+    op.execute(
+        "DELETE FROM preferences a USING preferences b "
+        "WHERE a.user_id = b.user_id AND a.city = b.city AND a.id < b.id"
+    )
+    op.create_index('ix_preferences_user_id_city', 'preferences', ['user_id', 'city'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_preferences_user_id_city', table_name='preferences')
+    op.create_index(op.f('ix_weatherusers_id'), 'weatherusers', ['id'], unique=False)
+    op.create_index(op.f('ix_preferences_id'), 'preferences', ['id'], unique=False)
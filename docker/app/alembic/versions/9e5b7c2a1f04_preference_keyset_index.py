@@ -0,0 +1,28 @@
+"""preference (user_id, id) keyset index
+
+Revision ID: 9e5b7c2a1f04
+Revises: 4c1f2a7d9b3e
+Create Date: 2026-10-18 11:03:27.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e5b7c2a1f04'
+down_revision: Union[str, Sequence[str], None] = '4c1f2a7d9b3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_preferences_user_id_id', 'preferences', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_preferences_user_id_id', table_name='preferences')
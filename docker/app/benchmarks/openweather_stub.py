@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenWeather current-weather endpoint.
+Point the app at it with OPENWEATHER_URL=http://127.0.0.1:<port>/data/2.5/weather.
+
+- every response waits --latency-ms ± --jitter-ms
+- --error-rate of requests answer 503 (the client retries those)
+- cities starting with --not-found-prefix answer 404 like unknown cities do
+
+    python benchmarks/openweather_stub.py --port 9100 --latency-ms 80 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import random
+import zlib
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def build_app(latency_ms: float = 50, jitter_ms: float = 20, error_rate: float = 0.0,
+              not_found_prefix: str = "nowhere") -> Starlette:
+    async def weather(request):
+        await asyncio.sleep(max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+
+        city = request.query_params.get("q", "")
+        if random.random() < error_rate:
+            return JSONResponse({"cod": "503", "message": "stub: injected failure"}, status_code=503)
+        if not city or city.lower().startswith(not_found_prefix):
+            return JSONResponse({"cod": "404", "message": "city not found"}, status_code=404)
+
+        # Stable per city, so cached and fresh answers agree
+        seed = zlib.crc32(city.lower().encode())
+        return JSONResponse({
+            "cod": 200,
+            "name": city,
+            "main": {"temp": round(-10 + seed % 450 / 10, 1), "humidity": seed % 100},
+            "weather": [{"main": "Clouds", "description": "scattered clouds"}],
+        })
+
+    return Starlette(routes=[Route("/data/2.5/weather", weather)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--not-found-prefix", default="nowhere")
+    args = parser.parse_args()
+
+    app = build_app(args.latency_ms, args.jitter_ms, args.error_rate, args.not_found_prefix)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Response micro-benchmark: JSON encoder and compression cost per response.
+
+For representative bodies (a weather dict, preference pages, /metrics text)
+reports encode time for stdlib json vs the app's encoder, and for each
+encoding the bytes on the wire and CPU spent compressing.
+
+    python benchmarks/serialization.py --rows 50,1000 --json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, APP_DIR)
+
+from prometheus_client import generate_latest
+
+import compression
+import responses
+from sre import metrics_service
+
+
+def _per_call_us(fn, min_seconds: float = 0.2) -> float:
+    """Mean microseconds per call, repeating until `min_seconds` have passed."""
+    calls, started = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return round(elapsed / calls * 1e6, 1)
+
+
+def _preference_rows(n: int) -> list:
+    return [{"id": i, "user_id": 1, "city": f"city-{i}", "alert_type": "email"} for i in range(1, n + 1)]
+
+
+def _metrics_text() -> bytes:
+    # Populate the latency histogram like a running app would
+    for i in range(40):
+        for status_class in ("2xx", "4xx", "5xx"):
+            metrics_service.request_latency_seconds.labels(f"/route/{i}", "GET", status_class).observe(0.01)
+    return generate_latest()
+
+
+def bodies(row_counts: list) -> dict:
+    weather = {"city": "Lagos", "temperature": 29.4, "description": "scattered clouds"}
+    out = {"weather": weather}
+    for n in row_counts:
+        out[f"preferences_{n}"] = _preference_rows(n)
+    return out
+
+
+def _gzip(body: bytes) -> bytes:
+    gz = zlib.compressobj(compression.GZIP_LEVEL, zlib.DEFLATED, 31)
+    return gz.compress(body) + gz.flush()
+
+
+def encoders() -> dict:
+    """Same settings CompressionMiddleware uses."""
+    out = {"gzip": _gzip}
+    if compression.brotli:
+        out["br"] = lambda body: compression.brotli.compress(body, quality=compression.BROTLI_QUALITY)
+    return out
+
+
+def run(row_counts: list) -> dict:
+    report = {}
+    payloads = bodies(row_counts)
+    for name, content in payloads.items():
+        encoded = responses.dumps(content)
+        report[name] = {
+            "json_stdlib_us": _per_call_us(lambda: json.dumps(content).encode()),
+            "json_app_us": _per_call_us(lambda: responses.dumps(content)),
+            "bytes": len(encoded),
+        }
+
+    text = _metrics_text()
+    report["metrics_text"] = {"bytes": len(text)}
+    bodies_bytes = {name: responses.dumps(content) for name, content in payloads.items()}
+    bodies_bytes["metrics_text"] = text
+
+    for name, body in bodies_bytes.items():
+        for encoding, compress in encoders().items():
+            if len(body) < compression.MIN_SIZE:
+                report[name][encoding] = "below COMPRESSION_MIN_SIZE, sent as-is"
+                continue
+            size = len(compress(body))
+            report[name][encoding] = {
+                "bytes": size,
+                "saved_pct": round(100 * (1 - size / len(body)), 1),
+                "cpu_us": _per_call_us(lambda: compress(body)),
+            }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="50,1000", help="preference page sizes")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run([int(n) for n in args.rows.split(",")])
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"JSON encoder: {'orjson' if responses.orjson else 'stdlib json (orjson not installed)'}")
+    print(f"{'body':<20}{'bytes':>9}{'stdlib us':>11}{'app us':>9}  compression")
+    for name, r in report.items():
+        line = f"{name:<20}{r['bytes']:>9}{r.get('json_stdlib_us', ''):>11}{r.get('json_app_us', ''):>9}  "
+        parts = []
+        for encoding in encoders():
+            c = r.get(encoding)
+            if isinstance(c, dict):
+                parts.append(f"{encoding}: {c['bytes']} B (-{c['saved_pct']}%) {c['cpu_us']} us")
+            elif c:
+                parts.append(f"{encoding}: {c}")
+        print(line + "; ".join(parts))
+
+
+if __name__ == "__main__":
+    main()
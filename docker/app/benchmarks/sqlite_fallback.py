@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+SQLite fallback benchmark: the old engine setup vs the WAL profile in db.py.
+
+Each run gets a fresh database file and the same mixed workload for
+--seconds: writer threads upsert preferences (one commit each, like
+POST /preferences) while reader threads page through a user's
+preferences (GET /preferences/{user_id}).
+
+    python benchmarks/sqlite_fallback.py --writers 4 --readers 8 --seconds 10
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, APP_DIR)
+# db.py needs a URL at import time; the benchmark builds its own engines
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "bench_import.db"))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import crud
+from models import Base, WeatherUser
+from schemas import PreferenceCreate
+from sre.db_pool import sqlite_options, sqlite_pragmas
+
+USERS = 50
+CITIES = [f"city-{i}" for i in range(200)]
+
+
+def _foreign_keys_only(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON;")
+    cursor.close()
+
+
+def baseline_engine(url: str):
+    """db.py before the WAL profile: rollback journal, default sync, FK pragma only."""
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", _foreign_keys_only)
+    return engine
+
+
+def tuned_engine(url: str):
+    engine = create_engine(url, **sqlite_options())
+    event.listen(engine, "connect", sqlite_pragmas)
+    return engine
+
+
+def _percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, round(q * (len(sorted_values) - 1)))]
+
+
+def _seed(Session):
+    with Session() as db:
+        db.add_all(WeatherUser(name=f"user {i}", email=f"user{i}@example.com") for i in range(USERS))
+        db.commit()
+
+
+def _writer(Session, stop, latencies, errors):
+    rng = random.Random()
+    while not stop.is_set():
+        pref = PreferenceCreate(user_id=rng.randint(1, USERS), city=rng.choice(CITIES), alert_type="email")
+        start = time.perf_counter()
+        try:
+            with Session() as db:
+                crud.upsert_preference(db, pref)
+                db.commit()
+            latencies.append(time.perf_counter() - start)
+        except OperationalError:
+            errors.append(1)  # "database is locked"
+
+
+def _reader(Session, stop, latencies, errors):
+    rng = random.Random()
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with Session() as db:
+                crud.get_preferences_page(db, rng.randint(1, USERS), limit=50)
+            latencies.append(time.perf_counter() - start)
+        except OperationalError:
+            errors.append(1)
+
+
+def _summary(latencies: list, errors: list, seconds: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "ops": len(values),
+        "ops_per_second": round(len(values) / seconds, 1),
+        "p50_ms": round(_percentile(values, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(values, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(values, 0.99) * 1000, 2),
+        "errors": len(errors),
+    }
+
+
+def run(make_engine, writers: int, readers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'fallback.db')}")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        _seed(Session)
+
+        stop = threading.Event()
+        results = {"write": ([], []), "read": ([], [])}
+        threads = [
+            threading.Thread(target=_writer, args=(Session, stop, *results["write"])) for _ in range(writers)
+        ] + [
+            threading.Thread(target=_reader, args=(Session, stop, *results["read"])) for _ in range(readers)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        engine.dispose()
+
+    return {role: _summary(lat, err, seconds) for role, (lat, err) in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = {
+        "baseline": run(baseline_engine, args.writers, args.readers, args.seconds),
+        "tuned": run(tuned_engine, args.writers, args.readers, args.seconds),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'setup':<10}{'role':<7}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for setup, roles in report.items():
+        for role, s in roles.items():
+            print(f"{setup:<10}{role:<7}{s['ops_per_second']:>10}{s['p50_ms']:>10}"
+                  f"{s['p95_ms']:>10}{s['p99_ms']:>10}{s['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+In-process container bootstrap.
+Runs every pre-serve stage in one interpreter, each one timed:
+  wait_for_db -> sqlite_tables -> migrations -> verify_startup
+then serves the app with uvicorn from the same process, so SQLAlchemy,
+Alembic and the models are imported once instead of once per script.
+Stage timings go to startup_timings (startup_phase_seconds on /metrics).
+"""
+
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import startup_timings
+from local_tz import timer
+
+APP_DIR = os.path.abspath(os.path.dirname(__file__))
+SQLITE_DIR = "/tmp/edgepaas"
+
+PORT = int(os.getenv("PORT", 80))
+WORKERS = int(os.getenv("WORKERS", 1))
+ENVIRONMENT = os.getenv("ENV", "prod").lower()
+
+stage_seconds = {}
+
+
+@contextmanager
+def stage(name: str):
+    print(f"[BOOTSTRAP] {timer()} Stage {name}...")
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        stage_seconds[name] = round(time.monotonic() - started, 3)
+        print(f"[BOOTSTRAP] Stage {name} took {stage_seconds[name]:.2f}s")
+
+
+def resolve_database() -> dict:
+    import wait_for_db
+
+    resolved = wait_for_db.resolve_database()
+    wait_for_db.write_env_file(resolved)
+    startup_timings.record("wait_for_db", resolved["timings"])
+    return resolved
+
+
+def create_sqlite_tables():
+    print("[BOOTSTRAP] SQLite confirmed by runtime resolver")
+    os.makedirs(SQLITE_DIR, mode=0o755, exist_ok=True)
+
+    # Imported only now: db.py builds its engines from the resolved DATABASE_URL
+    from db import engine
+    from create_sqlite_tables import create_tables
+    create_tables(engine)
+
+
+def run_migrations():
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(APP_DIR, "alembic.ini"))
+    print("[ALEMBIC] Running migrations...")
+    try:
+        command.upgrade(config, "head")
+    except Exception as e:
+        print(f"[ALEMBIC] Migration failed ({e}). Resetting...")
+        # Destructive and rare: keep it the standalone script it always was
+        subprocess.run([sys.executable, os.path.join(APP_DIR, "reset_alembic.py")], check=True)
+        print("[ALEMBIC] Retrying migrations...")
+        command.upgrade(config, "head")
+
+
+def verify_startup():
+    # Same import name the app uses (sre/readiness.py), so the module is loaded once
+    sys.path.append(os.path.join(APP_DIR, "sre"))
+    import verify_startup
+    verify_startup.main()
+
+
+def print_summary(resolved: dict):
+    print("==============================================")
+    print("[SUMMARY] Environment Ready")
+    print(f"  ENVIRONMENT       : {ENVIRONMENT}")
+    print(f"  FINAL_DB_MODE     : {resolved['final_db_mode']}")
+    print(f"  DATABASE_URL      : {resolved['database_url']}")
+    print(f"  RUN_MIGRATIONS    : {resolved['run_migrations']}")
+    print(f"  FASTAPI_PORT      : {PORT}")
+    print(f"  WORKERS           : {WORKERS}")
+    print(f"  BOOTSTRAP         : {stage_seconds}")
+    print("==============================================")
+
+
+def main():
+    startup_timings.reset()
+    started = time.monotonic()
+
+    with stage("wait_for_db"):
+        resolved = resolve_database()
+
+    if resolved["final_db_mode"] == "sqlite_only":
+        with stage("sqlite_tables"):
+            create_sqlite_tables()
+
+    if resolved["run_migrations"] == "true":
+        with stage("migrations"):
+            run_migrations()
+    else:
+        print("[ALEMBIC] Skipping migrations (SQLite or RUN_MIGRATIONS=false)")
+
+    with stage("verify_startup"):
+        verify_startup()
+
+    stage_seconds["bootstrap"] = round(time.monotonic() - started, 3)
+    for name, seconds in stage_seconds.items():
+        if name != "wait_for_db":  # recorded with its phases above
+            startup_timings.record(name, {"total_seconds": seconds})
+    print_summary(resolved)
+
+    if WORKERS > 1 and os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # This process only supervises from here on; drop the live gauges the
+        # stages above wrote under its pid (pool sizes...) so /metrics doesn't
+        # sum them into every scrape
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(os.getpid())
+
+    import uvicorn
+    print(f"[START] Starting FastAPI on port {PORT}...")
+    uvicorn.run("main:app", host="0.0.0.0", port=PORT, workers=WORKERS)
+
+
+if __name__ == "__main__":
+    main()
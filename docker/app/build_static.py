@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Static asset build step (run once at image build, see Dockerfile).
+For every file under static/:
+- copy it to static_dist/ as <name>.<content hash><ext>
+- write .gz / .br siblings for text assets when they come out smaller
+- record original -> hashed name in static_dist/manifest.json
+Templates resolve URLs through the manifest (static_assets.py).
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+from compression import COMPRESSIBLE, MIN_SIZE, brotli
+
+APP_DIR = os.path.abspath(os.path.dirname(__file__))
+STATIC_DIR = os.getenv("STATIC_DIR", os.path.join(APP_DIR, "static"))
+STATIC_DIST_DIR = os.getenv("STATIC_DIST_DIR", os.path.join(APP_DIR, "static_dist"))
+MANIFEST = "manifest.json"
+HASH_LENGTH = 12
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def _write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _variants(name: str, data: bytes) -> dict:
+    """Precompressed bodies worth keeping: max level, built once."""
+    media_type = mimetypes.guess_type(name)[0] or ""
+    if len(data) < MIN_SIZE or not COMPRESSIBLE.match(media_type):
+        return {}
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}  # mtime=0: reproducible
+    if brotli:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return {suffix: body for suffix, body in variants.items() if len(body) < len(data)}
+
+
+def build(static_dir: str = STATIC_DIR, dist_dir: str = STATIC_DIST_DIR) -> dict:
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    manifest = {}
+
+    for root, _, files in os.walk(static_dir):
+        for filename in sorted(files):
+            source = os.path.join(root, filename)
+            name = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                data = f.read()
+
+            stem, ext = os.path.splitext(name)
+            hashed = f"{stem}.{content_hash(data)}{ext}"
+            _write(os.path.join(dist_dir, hashed), data)
+            for suffix, body in _variants(name, data).items():
+                _write(os.path.join(dist_dir, hashed + suffix), body)
+            manifest[name] = hashed
+
+    _write(os.path.join(dist_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+if __name__ == "__main__":
+    manifest = build()
+    print(f"[STATIC] Built {len(manifest)} assets into {STATIC_DIST_DIR} ✅")
+    for name, hashed in sorted(manifest.items()):
+        print(f"  {name} -> {hashed}")
@@ -0,0 +1,146 @@
+# compression.py
+import os
+import re
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Compression tuning (can be adjusted via env vars)
+MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))   # bytes; smaller bodies go out as-is
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))      # 0-11; 4 is cheap enough per response
+
+COMPRESSIBLE = re.compile(r"^(text/|application/(json|x-ndjson|javascript|xml)|image/svg)")
+
+
+def accepted_encoding(accept_encoding: str, available: tuple = None) -> str:
+    """
+    Best encoding the client accepts out of `available` (in preference order;
+    default: what this module can produce). Returns "br", "gzip" or "".
+    """
+    if available is None:
+        available = ("br", "gzip") if brotli else ("gzip",)
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    for encoding in available:
+        if accepted.get(encoding, 0) > 0:
+            return encoding
+    return ""
+
+
+class _Encoder:
+    """Streaming compressor; `flush=True` makes each chunk decodable on arrival."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._gz = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data: bytes, flush: bool = False, final: bool = False) -> bytes:
+        if self.encoding == "br":
+            out = self._br.process(data)
+            if final:
+                return out + self._br.finish()
+            return out + self._br.flush() if flush else out
+        out = self._gz.compress(data)
+        if final:
+            return out + self._gz.flush()
+        return out + self._gz.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI response compression, negotiated from Accept-Encoding.
+    Brotli when the client accepts it and the module is installed, else gzip.
+    Bodies under MIN_SIZE, non-text types, already encoded responses and
+    responses that negotiate encoding themselves (`Vary: Accept-Encoding`,
+    e.g. /static) pass through untouched; streamed bodies are compressed
+    chunk by chunk. A strong ETag on a compressed response becomes weak.
+    """
+
+    def __init__(self, app, min_size: int = MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        encoding = accepted_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder = None
+
+        async def send_wrapper(message):
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                start = message  # held until the first body chunk decides
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start is not None:
+                response_start, start = start, None
+                if not self._should_compress(response_start, body, more_body):
+                    encoder = False
+                    await send(response_start)
+                    await send(message)
+                    return
+                encoder = _Encoder(encoding)
+                await send(self._encoded_start(response_start, encoding))
+
+            if encoder is False:
+                await send(message)
+                return
+            await send({
+                "type": "http.response.body",
+                "body": encoder.compress(body, flush=more_body, final=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _should_compress(self, start: dict, body: bytes, more_body: bool) -> bool:
+        headers = {k.lower(): v for k, v in start.get("headers", [])}
+        if b"content-encoding" in headers:
+            return False
+        if b"accept-encoding" in headers.get(b"vary", b"").lower():
+            return False
+        if not COMPRESSIBLE.match(headers.get(b"content-type", b"").decode("latin-1")):
+            return False
+        return more_body or len(body) >= self.min_size
+
+    @staticmethod
+    def _encoded_start(start: dict, encoding: str) -> dict:
+        headers = [(k, v) for k, v in start.get("headers", []) if k.lower() != b"content-length"]
+        vary = [token.strip() for k, v in headers if k.lower() == b"vary" for token in v.split(b",")]
+        vary = [token for token in vary if token and token.lower() != b"accept-encoding"]
+        headers = [(k, v) for k, v in headers if k.lower() != b"vary"]
+        headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+        # The compressed bytes differ from the ones the strong validator named
+        headers = [(k, b"W/" + v if k.lower() == b"etag" and not v.startswith(b"W/") else v)
+                   for k, v in headers]
+        headers.append((b"content-encoding", encoding.encode()))
+        return {**start, "headers": headers}
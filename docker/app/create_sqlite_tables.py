@@ -1,21 +1,42 @@
 # create_sqlite_tables.py
 import os
-from sqlalchemy import create_engine
-from models import Base
+from sqlalchemy import create_engine, inspect, text
+from models import Base, Preference
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
-if not DATABASE_URL or not DATABASE_URL.startswith("sqlite"):
-    print("[INFO] Not using SQLite, skipping table creation")
-    exit(0)
 
-print("[INFO] Creating tables for SQLite...")
+def create_tables(engine):
+    """
+    Create any missing tables on the SQLite fallback.
+    create_all() skips tables that already exist, so a fallback.db kept from an
+    older schema also gets the preferences indexes here (what Alembic does on Postgres).
+    """
+    print("[INFO] Creating tables for SQLite...")
+    Base.metadata.create_all(bind=engine)
+    ensure_preference_indexes(engine)
+    print("[INFO] SQLite tables created ✅")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
 
-Base.metadata.create_all(bind=engine)
+def ensure_preference_indexes(engine):
+    existing = {ix["name"] for ix in inspect(engine).get_indexes(Preference.__tablename__)}
+    with engine.begin() as conn:
+        if "ix_preferences_user_id_city" not in existing:
+            # Keep the newest row of every (user_id, city) duplicate, as migration 4c1f2a7d9b3e does
+            conn.execute(text(
+                "DELETE FROM preferences WHERE id NOT IN "
+                "(SELECT MAX(id) FROM preferences GROUP BY user_id, city)"
+            ))
+        for index in Preference.__table__.indexes:
+            index.create(conn, checkfirst=True)
 
-print("[INFO] SQLite tables created ✅")
+
+if __name__ == "__main__":
+    if not DATABASE_URL or not DATABASE_URL.startswith("sqlite"):
+        print("[INFO] Not using SQLite, skipping table creation")
+        exit(0)
+
+    create_tables(create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False}
+    ))
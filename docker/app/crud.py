@@ -1,23 +1,235 @@
+import csv
+import io
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models import WeatherUser, Preference
 from schemas import UserCreate, PreferenceCreate
 
+# Rows per statement for bulk writes
+BULK_BATCH_SIZE = 1000
+
+# CRUD helpers only add / flush. The caller owns the transaction and
+# commits once per unit of work (see db.transaction / db.async_transaction).
+# Helpers have an `_async` twin taking an AsyncSession; both build
+# their SQL from the same statement helpers below.
+
+# ---------------- Statements ----------------
+def _upsert_users_stmt(dialect: str, rows: list):
+    """INSERT ... ON CONFLICT (email) DO UPDATE SET name for the given dialect."""
+    dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = dialect_insert(WeatherUser).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[WeatherUser.email],
+        set_={"name": stmt.excluded.name},
+    )
+
+def _upsert_preferences_stmt(dialect: str):
+    """INSERT ... ON CONFLICT (user_id, city) DO UPDATE SET alert_type, for executemany."""
+    dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = dialect_insert(Preference)
+    return stmt.on_conflict_do_update(
+        index_elements=[Preference.user_id, Preference.city],
+        set_={"alert_type": stmt.excluded.alert_type},
+    )
+
+def _user_ids_stmt(emails: list):
+    return select(WeatherUser.email, WeatherUser.id).where(WeatherUser.email.in_(emails))
+
+def _user_rows(users: list) -> list:
+    latest = {u.email: u.name for u in users}  # last name per email wins
+    return [{"name": name, "email": email} for email, name in latest.items()]
+
+def _preference_rows(prefs: list) -> list:
+    latest = {(p.user_id, p.city): p.alert_type for p in prefs}  # last alert_type wins
+    return [
+        {"user_id": user_id, "city": city, "alert_type": alert_type}
+        for (user_id, city), alert_type in latest.items()
+    ]
+
+# Plain columns, not entities: rows serialise straight to dicts with no ORM
+# identity map or Pydantic model per row.
+PREFERENCE_COLUMNS = (Preference.id, Preference.user_id, Preference.city, Preference.alert_type)
+
+def _preferences_keyset_stmt(user_id: int, after_id: int = None, limit: int = None):
+    """Keyset page on (user_id, id): rows after `after_id`, oldest first."""
+    stmt = select(*PREFERENCE_COLUMNS).where(Preference.user_id == user_id)
+    if after_id is not None:
+        stmt = stmt.where(Preference.id > after_id)
+    stmt = stmt.order_by(Preference.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def _top_cities_stmt(limit: int):
+    return (
+        select(Preference.city)
+        .group_by(Preference.city)
+        .order_by(func.count(Preference.id).desc())
+        .limit(limit)
+    )
+
+def _subscriptions_stmt(after_id: int, limit: int):
+    """(preference id, user id, email, city, alert_type), keyset on preference id."""
+    return (
+        select(Preference.id, Preference.user_id, WeatherUser.email, Preference.city, Preference.alert_type)
+        .join(WeatherUser, WeatherUser.id == Preference.user_id)
+        .where(Preference.id > after_id)
+        .order_by(Preference.id)
+        .limit(limit)
+    )
+
+# ---------------- Sync ----------------
 def create_user(db: Session, user: UserCreate):
     db_user = WeatherUser(name=user.name, email=user.email)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    db.flush()
     return db_user
 
+def upsert_user(db: Session, user: UserCreate) -> int:
+    """Insert or update the user keyed on email. Returns the user id."""
+    return bulk_upsert_users(db, [user])[user.email]
+
+def bulk_upsert_users(db: Session, users: list) -> dict:
+    """Upsert many users on email in batches. Returns {email: id}."""
+    rows = _user_rows(users)
+    dialect = db.get_bind().dialect.name
+
+    ids = {}
+    for i in range(0, len(rows), BULK_BATCH_SIZE):
+        batch = rows[i:i + BULK_BATCH_SIZE]
+        db.execute(_upsert_users_stmt(dialect, batch))
+        ids.update(db.execute(_user_ids_stmt([row["email"] for row in batch])).all())
+    return ids
+
 def get_user(db: Session, user_id: int):
     return db.query(WeatherUser).filter(WeatherUser.id == user_id).first()
 
 def create_preference(db: Session, pref: PreferenceCreate):
     db_pref = Preference(user_id=pref.user_id, city=pref.city, alert_type=pref.alert_type)
     db.add(db_pref)
-    db.commit()
-    db.refresh(db_pref)
+    db.flush()
     return db_pref
 
+def upsert_preference(db: Session, pref: PreferenceCreate):
+    """One row per (user_id, city); a repeat submit updates alert_type."""
+    db.execute(_upsert_preferences_stmt(db.get_bind().dialect.name), _preference_rows([pref]))
+
+def bulk_upsert_preferences(db: Session, prefs: list) -> int:
+    """
+    Upsert many preferences inside the caller's transaction.
+    Postgres: COPY FROM STDIN into a temp table, then one INSERT ... ON CONFLICT.
+    Others: batched executemany upserts.
+    Returns the number of distinct (user_id, city) rows written.
+    """
+    rows = _preference_rows(prefs)
+    if not rows:
+        return 0
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        buf = io.StringIO()
+        csv.writer(buf).writerows((r["user_id"], r["city"], r["alert_type"]) for r in rows)
+        buf.seek(0)
+        raw = db.connection().connection.dbapi_connection
+        with raw.cursor() as cur:
+            cur.execute(
+                "CREATE TEMP TABLE preferences_import "
+                "(user_id integer, city varchar, alert_type varchar) ON COMMIT DROP"
+            )
+            cur.copy_expert(
+                "COPY preferences_import (user_id, city, alert_type) FROM STDIN WITH (FORMAT csv)", buf
+            )
+            cur.execute(
+                "INSERT INTO preferences (user_id, city, alert_type) "
+                "SELECT user_id, city, alert_type FROM preferences_import "
+                "ON CONFLICT (user_id, city) DO UPDATE SET alert_type = EXCLUDED.alert_type"
+            )
+        return len(rows)
+
+    stmt = _upsert_preferences_stmt(dialect)
+    for i in range(0, len(rows), BULK_BATCH_SIZE):
+        db.execute(stmt, rows[i:i + BULK_BATCH_SIZE])
+    return len(rows)
+
 def get_preferences_by_user(db: Session, user_id: int):
     return db.query(Preference).filter(Preference.user_id == user_id).all()
+
+def get_preferences_page(db: Session, user_id: int, after_id: int = None, limit: int = None) -> list:
+    """Preferences as plain dicts, keyset-paginated on id."""
+    return [dict(row) for row in db.execute(_preferences_keyset_stmt(user_id, after_id, limit)).mappings()]
+
+def get_top_cities(db: Session, limit: int):
+    """Most-subscribed cities first."""
+    return db.execute(_top_cities_stmt(limit)).scalars().all()
+
+def get_subscriptions_page(db: Session, after_id: int = 0, limit: int = BULK_BATCH_SIZE) -> list:
+    """Next `limit` subscriptions after preference id `after_id`, as plain tuples."""
+    return db.execute(_subscriptions_stmt(after_id, limit)).all()
+
+# ---------------- Async ----------------
+async def create_user_async(db: AsyncSession, user: UserCreate):
+    db_user = WeatherUser(name=user.name, email=user.email)
+    db.add(db_user)
+    await db.flush()
+    return db_user
+
+async def upsert_user_async(db: AsyncSession, user: UserCreate) -> int:
+    return (await bulk_upsert_users_async(db, [user]))[user.email]
+
+async def bulk_upsert_users_async(db: AsyncSession, users: list) -> dict:
+    rows = _user_rows(users)
+    dialect = db.get_bind().dialect.name
+
+    ids = {}
+    for i in range(0, len(rows), BULK_BATCH_SIZE):
+        batch = rows[i:i + BULK_BATCH_SIZE]
+        await db.execute(_upsert_users_stmt(dialect, batch))
+        ids.update((await db.execute(_user_ids_stmt([row["email"] for row in batch]))).all())
+    return ids
+
+async def get_user_async(db: AsyncSession, user_id: int):
+    return await db.get(WeatherUser, user_id)
+
+async def create_preference_async(db: AsyncSession, pref: PreferenceCreate):
+    db_pref = Preference(user_id=pref.user_id, city=pref.city, alert_type=pref.alert_type)
+    db.add(db_pref)
+    await db.flush()
+    return db_pref
+
+async def upsert_preference_async(db: AsyncSession, pref: PreferenceCreate):
+    await db.execute(_upsert_preferences_stmt(db.get_bind().dialect.name), _preference_rows([pref]))
+
+async def bulk_upsert_preferences_async(db: AsyncSession, prefs: list) -> int:
+    """Batched executemany upserts on every dialect (COPY stays on the sync path)."""
+    rows = _preference_rows(prefs)
+    stmt = _upsert_preferences_stmt(db.get_bind().dialect.name)
+    for i in range(0, len(rows), BULK_BATCH_SIZE):
+        await db.execute(stmt, rows[i:i + BULK_BATCH_SIZE])
+    return len(rows)
+
+async def get_preferences_by_user_async(db: AsyncSession, user_id: int):
+    result = await db.execute(select(Preference).where(Preference.user_id == user_id))
+    return result.scalars().all()
+
+async def get_preferences_page_async(db: AsyncSession, user_id: int, after_id: int = None,
+                                     limit: int = None) -> list:
+    result = await db.execute(_preferences_keyset_stmt(user_id, after_id, limit))
+    return [dict(row) for row in result.mappings()]
+
+async def stream_preferences_async(db: AsyncSession, user_id: int, after_id: int = None,
+                                   batch_size: int = 500):
+    """Yield preference dicts straight off a server-side cursor, `batch_size` rows at a time."""
+    stmt = _preferences_keyset_stmt(user_id, after_id).execution_options(yield_per=batch_size)
+    result = await db.stream(stmt)
+    async for row in result.mappings():
+        yield dict(row)
+
+async def get_top_cities_async(db: AsyncSession, limit: int):
+    return (await db.execute(_top_cities_stmt(limit))).scalars().all()
+
+async def get_subscriptions_page_async(db: AsyncSession, after_id: int = 0,
+                                       limit: int = BULK_BATCH_SIZE) -> list:
+    return (await db.execute(_subscriptions_stmt(after_id, limit))).all()
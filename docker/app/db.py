@@ -1,7 +1,13 @@
 import os
+import ssl
+from contextlib import contextmanager, asynccontextmanager
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from dotenv import load_dotenv
+from sre.db_pool import pool_options, sqlite_options, sqlite_pragmas, instrument_pool
+from sre.logger import logger
 
 load_dotenv()
 
@@ -16,32 +22,136 @@ except KeyError:
 # Detect if using SQLite
 is_sqlite = DATABASE_URL.startswith("sqlite")
 
+
+# libpq query parameters (valid on the psycopg2 URL) and how asyncpg takes them
+ASYNCPG_RENAMED = {"sslmode": "ssl", "connect_timeout": "timeout"}
+ASYNCPG_PASSTHROUGH = {"target_session_attrs", "passfile", "krbsrvname", "gsslib"}
+ASYNCPG_SERVER_SETTINGS = {"application_name", "client_encoding"}
+# Certificate files: asyncpg only takes them as an SSLContext
+LIBPQ_SSL_FILES = {"sslrootcert", "sslcert", "sslkey"}
+# Client-side socket tuning asyncpg has no equivalent for; dropped
+LIBPQ_ONLY = {"keepalives", "keepalives_idle", "keepalives_interval", "keepalives_count",
+              "tcp_user_timeout", "gssencmode"}
+
+
+def _server_settings(options: str) -> dict:
+    """libpq `options` ("-c key=value -c ...") as asyncpg server_settings."""
+    settings = {}
+    tokens = options.split()
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == "-c" and i + 1 < len(tokens):
+            i += 1
+            token = tokens[i]
+        elif token.startswith("-c"):
+            token = token[2:]
+        elif token.startswith("--"):
+            token = token[2:]
+        key, sep, value = token.partition("=")
+        if sep and not token.startswith("-"):
+            settings[key.replace("-", "_")] = value
+        else:
+            logger.warning(f"⚠️ DATABASE_URL options token {token!r} not understood, ignored for asyncpg")
+        i += 1
+    return settings
+
+
+def _ssl_context(sslmode: str, files: dict):
+    """
+    libpq sslmode + sslrootcert / sslcert / sslkey as an SSLContext for asyncpg.
+    verify-full checks the hostname; verify-ca, or any other mode with a root
+    certificate (as libpq does), checks the chain only; otherwise no verification.
+    """
+    if sslmode == "disable":
+        return None
+    context = ssl.create_default_context(cafile=files.get("sslrootcert"))
+    if sslmode != "verify-full":
+        context.check_hostname = False
+        if sslmode != "verify-ca" and "sslrootcert" not in files:
+            context.verify_mode = ssl.CERT_NONE
+    if "sslcert" in files:
+        context.load_cert_chain(files["sslcert"], keyfile=files.get("sslkey"))
+    return context
+
+
+def async_engine_args(url: str):
+    """
+    Same database, async driver: (url, connect_args) for create_async_engine.
+    postgresql:// -> postgresql+asyncpg://, libpq query parameters mapped to
+                     asyncpg arguments (see ASYNCPG_*), certificate files to an
+                     SSLContext; unknown ones are logged and dropped rather than
+                     failing on the first async query
+    sqlite://     -> sqlite+aiosqlite://
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite"), {}
+
+    query, connect_args, server_settings, ssl_files = {}, {}, {}, {}
+    for key, value in parsed.query.items():
+        if isinstance(value, tuple):
+            value = value[-1]
+        if key in ASYNCPG_RENAMED:
+            query[ASYNCPG_RENAMED[key]] = value
+        elif key in ASYNCPG_PASSTHROUGH:
+            query[key] = value
+        elif key in ASYNCPG_SERVER_SETTINGS:
+            server_settings[key] = value
+        elif key == "options":
+            server_settings.update(_server_settings(value))
+        elif key in LIBPQ_SSL_FILES:
+            ssl_files[key] = value
+        elif key in LIBPQ_ONLY:
+            continue
+        else:
+            logger.warning(f"⚠️ DATABASE_URL parameter {key!r} has no asyncpg equivalent, ignored for async sessions")
+
+    if ssl_files:
+        sslmode = query.pop("ssl", "prefer")
+        context = _ssl_context(sslmode, ssl_files)
+        if context is None:
+            query["ssl"] = sslmode
+        else:
+            connect_args["ssl"] = context
+
+    if "timeout" in query:
+        connect_args["timeout"] = float(query.pop("timeout"))
+    if server_settings:
+        connect_args["server_settings"] = server_settings
+    return parsed.set(drivername="postgresql+asyncpg", query=query), connect_args
+
+
 if is_sqlite:
-    # SQLite engine options
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},  # Required for FastAPI async
-        echo=False
-    )
-
-    # Ensure foreign keys are enforced
-    @event.listens_for(engine, "connect")
-    def _enable_foreign_keys(dbapi_connection, connection_record):
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON;")
-        cursor.close()
+    # SQLite engine options: pooled sync connections, WAL profile (see sre/db_pool.py)
+    engine = create_engine(DATABASE_URL, echo=False, **sqlite_options())
+    async_database_url, _ = async_engine_args(DATABASE_URL)
+    async_engine = create_async_engine(async_database_url, echo=False, **sqlite_options(is_async=True))
+
+    # Foreign keys enforced, journal / sync / cache pragmas on every new connection
+    event.listen(engine, "connect", sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", sqlite_pragmas)
+    instrument_pool(engine, "sync")
 
     print(f"[INFO(From DB Engine Script)]: Using SQLite, foreign keys enabled ✅")
 
 else:
-    # Standard Postgres / other DBs
-    engine = create_engine(DATABASE_URL)
+    # Standard Postgres / other DBs: explicit, instrumented pools
+    engine = create_engine(DATABASE_URL, **pool_options())
+    async_database_url, async_connect_args = async_engine_args(DATABASE_URL)
+    async_engine = create_async_engine(async_database_url, connect_args=async_connect_args,
+                                       **pool_options(is_async=True))
+    instrument_pool(engine, "sync")
+    instrument_pool(async_engine.sync_engine, "async")
     print(f"[INFO(From DB Engine Script)]: Using {DATABASE_URL.split(':')[0]} ✅")
 
 # Session setup
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async session setup, same database as SessionLocal
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 # Dependency for FastAPI
 def get_db():
     db = SessionLocal()
@@ -50,3 +160,33 @@ def get_db():
     finally:
         db.close()
 
+# Async dependency for FastAPI
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+
+# Unit of work: one commit per request, rollback on any error
+@contextmanager
+def transaction(db):
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+@asynccontextmanager
+async def async_transaction(db):
+    try:
+        yield db
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+# Close pooled connections on shutdown
+async def dispose_engines():
+    await async_engine.dispose()
+    engine.dispose()
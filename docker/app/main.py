@@ -1,31 +1,43 @@
 # main.py
-from fastapi import FastAPI, Request, Form, Depends
+from fastapi import FastAPI, Request, Form, Depends, Query, HTTPException, status
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi_utils.tasks import repeat_every
-from sre.metrics_service import cpu_percent, memory_percent, disk_percent
 from sqlalchemy.orm import Session
-import requests
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import asyncio
 import os
-import time
-import psutil
 
-import crud, models, schemas
-from db import get_db
+import crud, schemas
+import startup_timings
+from rendering import RenderCache
+from responses import FastJSONResponse, dumps
+from compression import CompressionMiddleware
+from static_assets import StaticAssets
+from db import get_db, get_async_db, transaction, async_transaction, AsyncSessionLocal, dispose_engines
 from sre.system_health import router as system_router
 from sre.health import router as health_router
-from sre.metrics import router as metrics_router
+from sre.metrics import router as metrics_router, mark_worker_dead
 from sre.metrics_service import (
     weather_requests_total,
     preferences_saved_total,
     failed_weather_requests_total,
-    request_latency_seconds,
-    active_users
+    active_users,
+    startup_phase_seconds
 )
 from sre.prometheus import PrometheusMiddleware
+from sre.request_id import RequestIdMiddleware
+from sre.logger import logger
+from sre.system_sampler import sampler
+from sre.readiness import readiness
+from weather.client import WeatherClient, status_of
+from weather.service import WeatherService
+from weather.shared_cache import SharedWeatherCache, SHARED_CACHE_ENABLED
+from weather.prefetch import WeatherPrefetcher, PREFETCH_ENABLED, PREFETCH_INTERVAL
+from weather.alerts import SubscriberAlertEngine, SUBSCRIBER_ALERTS_ENABLED, ALERT_CYCLE_INTERVAL
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # ---------------- Routers ----------------
 app.include_router(system_router)
@@ -33,20 +45,50 @@ app.include_router(health_router)
 app.include_router(metrics_router)
 
 # ---------------- Middleware ----------------
+app.add_middleware(CompressionMiddleware)  # innermost: latency includes compression
 app.add_middleware(PrometheusMiddleware)
+app.add_middleware(RequestIdMiddleware)  # outermost: ids cover every log line
 
 # ---------------- Static + templates ----------------
-app.mount("/static", StaticFiles(directory="static"), name="static")
+static_assets = StaticAssets()
+app.mount("/static", static_assets, name="static")
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["static_url"] = static_assets.url
+pages = RenderCache(templates)
 
 API_KEY = os.environ.get("OPENWEATHER_API_KEY")
 if not API_KEY:
     raise RuntimeError("OPENWEATHER_API_KEY is missing in container env!")
 
+WEATHER_BATCH_MAX = int(os.getenv("WEATHER_BATCH_MAX", 100))  # cities per /api/weather call
+PREFERENCES_PAGE_MAX = int(os.getenv("PREFERENCES_PAGE_MAX", 1000))  # rows per keyset page
+NDJSON_CHUNK_ROWS = 100  # rows per streamed chunk
+
+weather_client = WeatherClient(API_KEY)
+weather_service = WeatherService(
+    weather_client,
+    shared=SharedWeatherCache() if SHARED_CACHE_ENABLED else None,
+)
+
+@app.on_event("startup")
+async def start_weather_client():
+    await weather_client.start()
+
+@app.on_event("startup")
+def compile_templates():
+    pages.warm()
+
+@app.on_event("shutdown")
+async def close_weather_client():
+    await weather_client.close()
+    weather_service.close()
+    await dispose_engines()
+    mark_worker_dead()
+
 # ---------------- Routes ----------------
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request, "weather": None})
+    return HTMLResponse(pages.render("index.html", None, weather=None))
 
 @app.get("/health")
 async def health_test():
@@ -56,45 +98,68 @@ async def health_test():
 async def health_test():
     return {"status": "Succesful Edgepass!", "code": 200}
 
+async def lookup_weather(city: str) -> dict:
+    """Resolve one city through the weather service and record its metrics."""
+    resp = await weather_service.get(city)
+
+    # Ensure the failed_weather_requests_total metric has the right labels
+    status_code = status_of(resp)
+    status_code_str = str(status_code)
+
+    if status_code != 200:
+        # increment failed requests metric safely
+        if "labels" in dir(failed_weather_requests_total):
+            failed_weather_requests_total.labels(status_code=status_code_str).inc()
+        weather_info = {"city": city, "temperature": "N/A", "description": "City not found"}
+    else:
+        weather_info = {
+            "city": city,
+            "temperature": resp["main"]["temp"],
+            "description": resp["weather"][0]["description"],
+        }
+
+    # increment total weather requests metric safely
+    if "labels" in dir(weather_requests_total):
+        weather_requests_total.labels(status_code=status_code_str).inc()
+
+    return weather_info
+
+
 @app.post("/weather", response_class=HTMLResponse)
-async def get_weather(request: Request, city: str = Form(...)):
-    start = time.time()
-    try:
-        url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={API_KEY}&units=metric"
-        resp = requests.get(url).json()
-
-        # Ensure the failed_weather_requests_total metric has the right labels
-        status_code = resp.get("cod", 500)
-        if isinstance(status_code, int):
-            status_code_str = str(status_code)
-        else:
-            status_code_str = status_code
-
-        if status_code != 200:
-            # increment failed requests metric safely
-            if "labels" in dir(failed_weather_requests_total):
-                failed_weather_requests_total.labels(status_code=status_code_str).inc()
-            weather_info = {"city": city, "temperature": "N/A", "description": "City not found"}
-        else:
-            weather_info = {
-                "city": city,
-                "temperature": resp["main"]["temp"],
-                "description": resp["weather"][0]["description"],
-            }
-
-        # increment total weather requests metric safely
-        if "labels" in dir(weather_requests_total):
-            weather_requests_total.labels(status_code=status_code_str).inc()
-
-        return templates.TemplateResponse("index.html", {"request": request, "weather": weather_info})
-
-    finally:
-        request_latency_seconds.labels(endpoint="/weather").observe(time.time() - start)
+async def get_weather(request: Request, city: str = Form(...), format: Optional[str] = Query(None)):
+    """
+    Weather for one city.
+    - `?format=json` or `Accept: application/json` → the weather dict as compact JSON.
+    - Otherwise the index page, rendered once per (city, weather snapshot).
+    """
+    weather_info = await lookup_weather(city)
+    headers = {"Vary": "Accept"}
+
+    if format == "json" or "application/json" in request.headers.get("accept", ""):
+        return FastJSONResponse(weather_info, headers=headers)
+
+    snapshot = (weather_info["city"], weather_info["temperature"], weather_info["description"])
+    return HTMLResponse(pages.render("index.html", snapshot, weather=weather_info), headers=headers)
+
+
+@app.get("/api/weather")
+async def get_weather_batch(city: List[str] = Query(...)):
+    """
+    Weather for many cities in one round trip.
+    Cities resolve concurrently through the cache / coalescing path.
+    """
+    if len(city) > WEATHER_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {WEATHER_BATCH_MAX} cities per request",
+        )
+    results = await asyncio.gather(*(lookup_weather(c) for c in city))
+    return {"count": len(results), "results": results}
 
 
 @app.get("/preferences", response_class=HTMLResponse)
 async def read_preferences(request: Request):
-    return templates.TemplateResponse("preferences.html", {"request": request})
+    return HTMLResponse(pages.render("preferences.html", None))
 
 
 @app.post("/preferences")
@@ -103,33 +168,125 @@ async def save_preferences(
     email: str = Form(...),
     city: str = Form(...),
     alert_type: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     preferences_saved_total.inc()
     active_users.inc()  # Increment active users
 
-    user = db.query(models.WeatherUser).filter(models.WeatherUser.email == email).first()
-    if not user:
-        user_in = schemas.UserCreate(name=name, email=email)
-        user = crud.create_user(db, user_in)
+    async with async_transaction(db):
+        user_id = await crud.upsert_user_async(db, schemas.UserCreate(name=name, email=email))
+        pref_in = schemas.PreferenceCreate(user_id=user_id, city=city, alert_type=alert_type)
+        await crud.upsert_preference_async(db, pref_in)
 
-    pref_in = schemas.PreferenceCreate(user_id=user.id, city=city, alert_type=alert_type)
-    crud.create_preference(db, pref_in)
-    crud.create_preference(db, pref_in)
+    return FastJSONResponse({"message": "Preferences saved!", "user_id": user_id})
 
-    return JSONResponse({"message": "Preferences saved!", "user_id": user.id})
+
+@app.post("/api/preferences/bulk")
+def import_preferences(
+    prefs: List[schemas.PreferenceImport],
+    db: Session = Depends(get_db),
+):
+    """
+    Bulk preference import in a single transaction.
+    Users are upserted on email, then all preferences are written in one pass.
+    Sync on purpose (runs in the threadpool) so Postgres can use COPY.
+    """
+    with transaction(db):
+        user_ids = crud.bulk_upsert_users(
+            db, [schemas.UserCreate(name=p.name, email=p.email) for p in prefs]
+        )
+        imported = crud.bulk_upsert_preferences(db, [
+            schemas.PreferenceCreate(user_id=user_ids[p.email], city=p.city, alert_type=p.alert_type)
+            for p in prefs
+        ])
+
+    preferences_saved_total.inc(imported)
+    return {"message": "Preferences imported!", "users": len(user_ids), "preferences": imported}
 
 
 @app.get("/preferences/{user_id}")
-async def get_user_preferences(user_id: int, db: Session = Depends(get_db)):
-    prefs = crud.get_preferences_by_user(db, user_id)
-    return [schemas.PreferenceOut.from_orm(p) for p in prefs]
+async def get_user_preferences(
+    request: Request,
+    user_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=PREFERENCES_PAGE_MAX),
+    after_id: Optional[int] = Query(None, ge=0),
+    format: Optional[str] = Query(None),
+):
+    """
+    A user's preferences, oldest first.
+    - `?limit=N[&after_id=<cursor>]` → keyset page; `X-Next-Cursor` holds the next `after_id`.
+    - `?format=ndjson` or `Accept: application/x-ndjson` → every row streamed as JSON lines.
+    Without either, the full list is returned as before.
+    """
+    if format == "ndjson" or "application/x-ndjson" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            stream_preferences_ndjson(user_id, after_id),
+            media_type="application/x-ndjson",
+        )
+
+    # Session opened here, not as a dependency: the stream branch opens its own
+    async with AsyncSessionLocal() as db:
+        # One extra row tells us whether another page exists
+        rows = await crud.get_preferences_page_async(db, user_id, after_id, limit + 1 if limit else None)
+    headers = {}
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = str(rows[-1]["id"])
+    return FastJSONResponse(rows, headers=headers)
+
+
+async def stream_preferences_ndjson(user_id: int, after_id: Optional[int]):
+    # Own session: the stream outlives the request-scoped dependency
+    async with AsyncSessionLocal() as db:
+        lines = []
+        async for row in crud.stream_preferences_async(db, user_id, after_id):
+            lines.append(dumps(row))
+            if len(lines) >= NDJSON_CHUNK_ROWS:
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+        if lines:
+            yield b"\n".join(lines) + b"\n"
+
+@app.on_event("startup")
+def publish_startup_timings():
+    for stage, phases in startup_timings.load().items():
+        for phase, seconds in phases.items():
+            if phase.endswith("_seconds"):
+                startup_phase_seconds.labels(stage=stage, phase=phase[:-len("_seconds")]).set(seconds)
+
+@app.on_event("startup")
+def start_background_checks():
+    sampler.start()
+    readiness.start()
+
+@app.on_event("shutdown")
+def stop_background_checks():
+    sampler.stop()
+    readiness.stop()
+
+def log_task_failure(task: str):
+    """repeat_every on_exception hook: a failed cycle is logged and the task keeps its schedule."""
+    def on_exception(exc: Exception):
+        logger.error(f"❌ Background task {task} failed: {exc!r}", exc_info=exc)
+    return on_exception
+
+weather_prefetcher = WeatherPrefetcher(weather_service)
+
+@app.on_event("startup")
+@repeat_every(seconds=PREFETCH_INTERVAL, wait_first=5, on_exception=log_task_failure("weather prefetch"))
+async def prefetch_subscribed_weather():
+    if PREFETCH_ENABLED and weather_prefetcher.should_run():
+        await weather_prefetcher.run_once()
+
+subscriber_alerts = SubscriberAlertEngine(weather_service)
 
 @app.on_event("startup")
-@repeat_every(seconds=5)
-def update_system_metrics():
-    cpu_percent.set(psutil.cpu_percent())
-    mem = psutil.virtual_memory()
-    memory_percent.set(mem.percent)
-    disk_percent.set(psutil.disk_usage("/tmp").percent)
+@repeat_every(seconds=ALERT_CYCLE_INTERVAL, wait_first=30, on_exception=log_task_failure("subscriber alerts"))
+async def send_subscriber_alerts():
+    # every worker ticks, only the one holding the engine lock runs the cycle
+    if SUBSCRIBER_ALERTS_ENABLED and subscriber_alerts.acquire():
+        await subscriber_alerts.run_once()
 
+@app.on_event("shutdown")
+def close_subscriber_alerts():
+    subscriber_alerts.close()
@@ -1,19 +1,25 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from db import Base
 
 class WeatherUser(Base):
     __tablename__ = "weatherusers"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False)
     preferences = relationship("Preference", back_populates="user")
 
 class Preference(Base):
     __tablename__ = "preferences"
+    __table_args__ = (
+        # Serves user_id lookups and keeps one row per (user, city)
+        Index("ix_preferences_user_id_city", "user_id", "city", unique=True),
+        # Keyset pagination on (user_id, id)
+        Index("ix_preferences_user_id_id", "user_id", "id"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("weatherusers.id"))
     city = Column(String, nullable=False)
     alert_type = Column(String, nullable=False)
@@ -0,0 +1,47 @@
+# rendering.py
+import os
+from collections import OrderedDict
+
+from fastapi.templating import Jinja2Templates
+
+from sre.metrics_service import (
+    render_cache_hits_total,
+    render_cache_misses_total,
+)
+
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", 1024))  # rendered pages kept
+
+
+class RenderCache:
+    """
+    Rendered-HTML cache over Jinja2Templates.
+    Templates are compiled once (`warm()` at startup) and never re-checked
+    on disk. `render()` memoises output per (template, key): callers pass a
+    key that fully determines the context, e.g. the weather snapshot.
+    """
+
+    def __init__(self, templates: Jinja2Templates, max_size: int = RENDER_CACHE_SIZE):
+        self.templates = templates
+        self.templates.env.auto_reload = False  # no mtime check per render
+        self.max_size = max_size
+        self._pages = OrderedDict()  # (name, key) -> html
+
+    def warm(self):
+        """Compile every template up front."""
+        for name in self.templates.env.list_templates():
+            self.templates.get_template(name)
+
+    def render(self, name: str, key, **context) -> str:
+        cache_key = (name, key)
+        html = self._pages.get(cache_key)
+        if html is not None:
+            render_cache_hits_total.inc()
+            self._pages.move_to_end(cache_key)
+            return html
+
+        render_cache_misses_total.inc()
+        html = self.templates.get_template(name).render(context)
+        self._pages[cache_key] = html
+        if len(self._pages) > self.max_size:
+            self._pages.popitem(last=False)
+        return html
@@ -0,0 +1,48 @@
+# responses.py
+import json
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.engine import Row, RowMapping
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    """Types the JSON encoder does not know: Pydantic models, Core rows, ORM objects."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, RowMapping):
+        return dict(obj)
+    if isinstance(obj, Row):
+        return dict(obj._mapping)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    state = inspect(obj, raiseerr=False)
+    if state is not None and hasattr(state, "mapper"):
+        return {attr.key: getattr(obj, attr.key) for attr in state.mapper.column_attrs}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson:
+    def dumps(content) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    def dumps(content) -> bytes:
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    App-wide JSON response: orjson when installed (stdlib json otherwise),
+    compact output, and Pydantic models / SQLAlchemy rows / ORM objects
+    serialised directly.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -17,6 +17,12 @@ class PreferenceCreate(BaseModel):
     city: str
     alert_type: str
 
+class PreferenceImport(BaseModel):
+    name: str
+    email: EmailStr
+    city: str
+    alert_type: str
+
 class PreferenceOut(BaseModel):
     id: int
     user_id: int
@@ -0,0 +1,228 @@
+# app/sre/alert_dispatcher.py
+
+import atexit
+import os
+import queue
+import random
+import re
+import smtplib
+import sys
+import threading
+import time
+from email.message import EmailMessage
+
+import requests
+
+# allow importing logger from the same folder and sre.* from the app root
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from logger import logger
+from sre.metrics_service import (
+    alerts_enqueued_total,
+    alerts_suppressed_total,
+    alerts_dropped_total,
+    alert_deliveries_total,
+)
+
+ALERT_WEBHOOK = os.getenv("ALERT_WEBHOOK_URL")
+ALERT_EMAIL_TO = os.environ.get("EMAIL_TO")
+ALERT_EMAIL_FROM = os.environ.get("EMAIL_FROM")
+ALERT_EMAIL_PASS = os.environ.get("EMAIL_PASS")
+ALERT_SMTP_HOST = os.getenv("ALERT_SMTP_HOST", "smtp.server.com")
+ALERT_SMTP_PORT = int(os.getenv("ALERT_SMTP_PORT", 465))
+
+# Dispatch tuning (can be adjusted via env vars)
+QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", 1000))
+DIGEST_WINDOW = float(os.getenv("ALERT_DIGEST_WINDOW", 30))    # seconds collected per digest
+DEDUP_SECONDS = float(os.getenv("ALERT_DEDUP_SECONDS", 300))   # same fingerprint sent at most once per
+MAX_PER_DIGEST = int(os.getenv("ALERT_MAX_PER_DIGEST", 20))    # distinct alerts listed per digest
+MAX_RETRIES = int(os.getenv("ALERT_MAX_RETRIES", 3))
+BACKOFF_BASE = float(os.getenv("ALERT_BACKOFF_BASE", 1))       # seconds
+FLUSH_TIMEOUT = float(os.getenv("ALERT_FLUSH_TIMEOUT", 10))    # seconds allowed at exit
+
+_NUMBERS = re.compile(r"\d+(\.\d+)?")
+_STOP = object()
+
+
+def fingerprint(message: str) -> str:
+    """
+    Identity of an alert regardless of the readings in it:
+    "High CPU usage: 91.2%" and "High CPU usage: 97.8%" are the same alert.
+    """
+    return _NUMBERS.sub("#", message).strip().lower()
+
+
+class AlertDispatcher:
+    """
+    Background alert delivery.
+    `enqueue()` never blocks: alerts go on a bounded queue and a worker thread
+    groups everything seen within DIGEST_WINDOW into one digest. Repeats of a
+    fingerprint are counted, not resent, for DEDUP_SECONDS. Delivery tries the
+    webhook, then email, over kept-alive HTTP / SMTP connections, retrying with
+    exponential backoff.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._pending = {}    # fingerprint -> [latest message, count]
+        self._last_sent = {}  # fingerprint -> monotonic time of last delivery
+        self._http = requests.Session()
+        self._smtp = None
+
+    # ---------------- Producer side ----------------
+    def enqueue(self, message: str):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(message)
+            alerts_enqueued_total.inc()
+        except queue.Full:
+            alerts_dropped_total.inc()
+            logger.warning(f"⚠️ Alert queue full, dropped: {message}")
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def stop(self, timeout: float = FLUSH_TIMEOUT):
+        """Deliver whatever is pending and stop the worker."""
+        if self._thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            # Bounded: a full queue behind a worker in retry backoff must not hang exit
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("⚠️ Alert queue still full at shutdown, pending alerts not flushed")
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        self._thread = None
+        self._close_smtp()
+
+    # ---------------- Worker side ----------------
+    def _run(self):
+        window_end = None
+        while True:
+            timeout = None if window_end is None else max(0.0, window_end - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._flush()
+                return
+            if item is not None:
+                self._collect(item)
+                if window_end is None:
+                    window_end = time.monotonic() + DIGEST_WINDOW
+
+            if window_end is not None and time.monotonic() >= window_end:
+                self._flush()
+                window_end = None
+
+    def _collect(self, message: str):
+        fp = fingerprint(message)
+        last = self._last_sent.get(fp)
+        if last is not None and time.monotonic() - last < DEDUP_SECONDS:
+            alerts_suppressed_total.inc()
+            return
+        if fp in self._pending:
+            alerts_suppressed_total.inc()
+            self._pending[fp][0] = message
+            self._pending[fp][1] += 1
+        else:
+            self._pending[fp] = [message, 1]
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+
+        now = time.monotonic()
+        for fp in pending:
+            self._last_sent[fp] = now
+        self._last_sent = {fp: t for fp, t in self._last_sent.items() if now - t < DEDUP_SECONDS}
+
+        self._deliver(self._digest(list(pending.values())))
+
+    @staticmethod
+    def _digest(entries: list) -> str:
+        if len(entries) == 1 and entries[0][1] == 1:
+            return entries[0][0]
+
+        total = sum(count for _, count in entries)
+        lines = [f"EdgePaaS alert digest: {total} alerts in the last {DIGEST_WINDOW:.0f}s"]
+        for message, count in entries[:MAX_PER_DIGEST]:
+            lines.append(f"- [x{count}] {message}" if count > 1 else f"- {message}")
+        if len(entries) > MAX_PER_DIGEST:
+            lines.append(f"- ... and {len(entries) - MAX_PER_DIGEST} more")
+        return "\n".join(lines)
+
+    def _deliver(self, text: str):
+        if ALERT_WEBHOOK and ALERT_WEBHOOK.startswith("http"):
+            if self._with_retry("webhook", lambda: self._send_webhook(text)):
+                return
+        if ALERT_EMAIL_TO and ALERT_EMAIL_FROM and ALERT_EMAIL_PASS:
+            if self._with_retry("email", lambda: self._send_email("EdgePaaS Alert", text)):
+                return
+        logger.error("❌ No alert channel delivered the alert")
+
+    def _with_retry(self, channel: str, send) -> bool:
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                send()
+                alert_deliveries_total.labels(channel=channel, result="sent").inc()
+                logger.info(f"✅ {channel.capitalize()} alert sent successfully")
+                return True
+            except Exception as e:
+                logger.error(f"❌ {channel.capitalize()} alert failed (attempt {attempt + 1}): {e}")
+                if attempt < MAX_RETRIES:
+                    time.sleep(BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.5))
+        alert_deliveries_total.labels(channel=channel, result="failed").inc()
+        return False
+
+    def _send_webhook(self, text: str):
+        response = self._http.post(ALERT_WEBHOOK, json={"text": text}, timeout=5)
+        response.raise_for_status()
+
+    def _send_email(self, subject: str, body: str):
+        msg = EmailMessage()
+        msg["Subject"] = subject
+        msg["From"] = ALERT_EMAIL_FROM
+        msg["To"] = ALERT_EMAIL_TO
+        msg.set_content(body)
+
+        try:
+            self._smtp_connection().send_message(msg)
+        except (smtplib.SMTPException, OSError):
+            # Kept-alive connection may have been dropped by the server
+            self._close_smtp()
+            raise
+
+    def _smtp_connection(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.noop()
+                return self._smtp
+            except (smtplib.SMTPException, OSError):
+                self._close_smtp()
+        self._smtp = smtplib.SMTP_SSL(ALERT_SMTP_HOST, ALERT_SMTP_PORT, timeout=10)
+        self._smtp.login(ALERT_EMAIL_FROM, ALERT_EMAIL_PASS)
+        return self._smtp
+
+    def _close_smtp(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+
+dispatcher = AlertDispatcher()
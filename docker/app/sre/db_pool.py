@@ -0,0 +1,128 @@
+# app/sre/db_pool.py
+import os
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool, NullPool
+
+from sre.metrics_service import (
+    db_pool_size,
+    db_pool_checked_out,
+    db_pool_overflow,
+    db_pool_checkout_seconds,
+    db_pool_timeouts_total,
+    db_pool_invalidations_total,
+)
+
+# Pool tuning (can be adjusted via env vars)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", 10))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))       # seconds to wait for a connection
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))       # seconds, -1 disables
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("true", "yes", "1")
+
+# SQLite fallback tuning (can be adjusted via env vars)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")         # readers no longer block on a writer
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")        # fsync at checkpoints, not every commit
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", 16384))            # page cache per connection
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", 128 * 1024 * 1024))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))  # wait for the write lock, don't fail
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", 5))
+
+
+def _timed(pool_cls):
+    """Pool subclass that records how long each checkout waited."""
+
+    class TimedPool(pool_cls):
+        _metrics_name = "default"
+
+        def recreate(self):
+            new = super().recreate()
+            new._metrics_name = self._metrics_name
+            return new
+
+        def _do_get(self):
+            start = time.monotonic()
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                db_pool_timeouts_total.labels(engine=self._metrics_name).inc()
+                raise
+            finally:
+                db_pool_checkout_seconds.labels(engine=self._metrics_name).observe(
+                    time.monotonic() - start
+                )
+
+    TimedPool.__name__ = f"Timed{pool_cls.__name__}"
+    return TimedPool
+
+
+TimedQueuePool = _timed(QueuePool)
+TimedAsyncQueuePool = _timed(AsyncAdaptedQueuePool)
+
+
+def pool_options(is_async: bool = False) -> dict:
+    """create_engine / create_async_engine kwargs for a Postgres pool."""
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": POOL_MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+
+
+def sqlite_options(is_async: bool = False) -> dict:
+    """
+    create_engine / create_async_engine kwargs for the SQLite fallback.
+    Sync connections are pooled and kept so each one keeps its page cache and
+    mmap and the pragmas run once per connection. aiosqlite stays on NullPool:
+    every pooled aiosqlite connection holds a non-daemon worker thread, which
+    keeps any process that never disposes the engine from exiting.
+    """
+    if is_async:
+        return {"poolclass": NullPool}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": SQLITE_POOL_SIZE,
+        "max_overflow": POOL_MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "connect_args": {"check_same_thread": False},  # Required for FastAPI async
+    }
+
+
+def sqlite_pragmas(dbapi_connection, connection_record):
+    """`connect` listener: foreign keys plus the performance profile above."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON;")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS};")
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE};")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS};")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB};")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES};")
+    cursor.execute("PRAGMA temp_store=MEMORY;")
+    cursor.close()
+
+
+def instrument_pool(engine, name: str):
+    """
+    Export pool state for `engine` under the `engine=<name>` label.
+    Pass the sync engine (AsyncEngine.sync_engine for async ones).
+    """
+    pool = engine.pool
+    pool._metrics_name = name
+    db_pool_size.labels(engine=name).set(pool.size())
+
+    def _update(*_):
+        db_pool_checked_out.labels(engine=name).set(pool.checkedout())
+        db_pool_overflow.labels(engine=name).set(max(0, pool.overflow()))
+
+    def _invalidated(dbapi_connection, connection_record, exception):
+        db_pool_invalidations_total.labels(engine=name).inc()
+
+    event.listen(engine, "checkout", _update)
+    event.listen(engine, "checkin", _update)
+    event.listen(engine, "invalidate", _invalidated)
+    event.listen(engine, "soft_invalidate", _invalidated)
@@ -2,18 +2,15 @@
 import os
 import sys
 from fastapi import APIRouter, status
-from fastapi.responses import JSONResponse
 
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 from logger import logger
-from verify_startup import check_db, check_migrations
+from sre.readiness import readiness
+from responses import FastJSONResponse
 
 
 router = APIRouter()
 
-DATABASE_URL = os.environ.get("DATABASE_URL")
-FINAL_DB_MODE = os.environ.get("FINAL_DB_MODE")
-
 @router.get("/health/live")
 def liveness():
     """
@@ -22,7 +19,7 @@ def liveness():
     No dependency checks.
     """
     logger.info("Liveness check OK ✅")
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status.HTTP_200_OK,
         content={
             "status": "alive",
@@ -33,40 +30,35 @@ def liveness():
 
 
 @router.get("/health/ready")
-def readiness():
+def readiness_probe():
     """
     Readiness probe.
     Confirms the app is ready to receive traffic.
-    Checks:
-      - DB connectivity
-      - Alembic migration state (skipped for SQLite)
+    Reads the cached result of the background checker:
+      - DB connectivity (pinged every READY_CHECK_INTERVAL s)
+      - Alembic migration state (checked once at startup, skipped for SQLite)
+    Results older than READY_MAX_STALENESS s count as not ready.
     """
-    try:
-        check_db()
-
-        # Only run migrations check if using Postgres
-        if not DATABASE_URL.startswith("sqlite"):
-            check_migrations()
-        else:
-            logger.info("Readiness migrations check skipped (SQLite fallback) ✅")
+    state = readiness.state()
+    details = {"checked_age_seconds": state["age_seconds"], "stale": state["stale"]}
 
-        logger.info("Readiness check OK ✅")
-        return JSONResponse(
+    if state["ready"]:
+        return FastJSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 "status": "ready",
                 "icon": "✅",
-                "message": "Database and migrations are healthy"
+                "message": "Database and migrations are healthy",
+                **details,
             }
         )
 
-    except Exception as exc:
-        logger.error(f"Readiness check FAILED ❌: {exc}")
-        return JSONResponse(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            content={
-                "status": "not ready",
-                "icon": "❌",
-                "message": str(exc)
-            }
-        )
+    return FastJSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "status": "not ready",
+            "icon": "❌",
+            "message": state["error"],
+            **details,
+        }
+    )
@@ -1,7 +1,14 @@
 # app/sre/logger.py
+import atexit
+import copy
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 # Decide log path based on environment
 if os.getenv("AWS", "AZURE").lower() in ("true", "yes", "1"):
@@ -16,32 +23,172 @@ os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
 # Log level from env or default INFO
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
+# Output and pipeline tuning (can be adjusted via env vars)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()                               # json | text
+LOG_QUEUE = os.getenv("LOG_QUEUE", "true").lower() in ("true", "yes", "1")         # background writer
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+LOG_RATE_WINDOW = float(os.getenv("LOG_RATE_WINDOW", 60))   # seconds
+LOG_RATE_BURST = int(os.getenv("LOG_RATE_BURST", 20))       # records per call site per window, in full
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", 100))  # then keep 1 in N
+
 # Create logger
 logger = logging.getLogger("edgepaas")
 logger.setLevel(LOG_LEVEL)
+logger.propagate = False  # own handlers; no duplicates if something configures the root logger
+
+# This module is imported both as `logger` and `sre.logger`; share the
+# request-id var through the logger object so both see the same one.
+request_id_var = getattr(logger, "request_id_var", None) or ContextVar("request_id", default="-")
+logger.request_id_var = request_id_var
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp the current request id on the record (runs in the caller's context)."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per call site, below WARNING: the first LOG_RATE_BURST records of each
+    LOG_RATE_WINDOW pass, after that 1 in LOG_SAMPLE_EVERY. The next record
+    that passes carries `suppressed` = how many were dropped before it.
+    Warnings and errors always pass.
+    """
+
+    def __init__(self, window: float = LOG_RATE_WINDOW, burst: int = LOG_RATE_BURST,
+                 sample_every: int = LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.sample_every = max(1, sample_every)
+        self._sites = {}  # (pathname, lineno) -> [window_start, seen, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                suppressed = site[2] if site else 0
+                site = self._sites[key] = [now, 0, suppressed]
+            site[1] += 1
+            seen = site[1]
+            if seen > self.burst and (seen - self.burst) % self.sample_every:
+                site[2] += 1
+                return False
+            record.suppressed, site[2] = site[2], 0
+        return True
+
+
+_traceback_formatter = logging.Formatter()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks or raises on a full queue: the record is
+    dropped and counted, and the next record that gets through carries
+    `dropped` = how many were lost before it.
+    """
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0   # total since start
+        self._pending = 0  # not yet reported on a record
+        self._lock_dropped = threading.Lock()
+
+    def prepare(self, record):
+        """
+        Like QueueHandler.prepare, but the traceback stays in `exc_text` instead
+        of being folded into the message, so formatters can still place it.
+        """
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        record.stack_info = None
+        return record
+
+    def enqueue(self, record):
+        with self._lock_dropped:
+            if self._pending:
+                record.dropped, self._pending = self._pending, 0
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock_dropped:
+                self.dropped += 1
+                self._pending += 1 + getattr(record, "dropped", 0)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if getattr(record, "dropped", 0):
+            entry["dropped"] = record.dropped
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:  # already formatted by DroppingQueueHandler.prepare
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
 
 # Formatter with timestamp
-formatter = logging.Formatter(
-    fmt="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
-
-# File handler with rotation
-file_handler = RotatingFileHandler(
-    LOG_PATH,
-    maxBytes=5 * 1024 * 1024,  # 5 MB
-    backupCount=5,
-)
-file_handler.setFormatter(formatter)
-
-# Console handler
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(formatter)
+if LOG_FORMAT == "json":
+    formatter = JsonFormatter()
+else:
+    formatter = logging.Formatter(
+        fmt="%(asctime)s | %(levelname)s | %(name)s | %(request_id)s | %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
 
 # Add handlers only once
 if not logger.handlers:
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # File handler with rotation
+    file_handler = RotatingFileHandler(
+        LOG_PATH,
+        maxBytes=5 * 1024 * 1024,  # 5 MB
+        backupCount=5,
+    )
+    file_handler.setFormatter(formatter)
+
+    # Console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+
+    if LOG_QUEUE:
+        # Callers only enqueue (dropping, not blocking, when full); one listener thread formats and writes
+        queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        queue_handler.addFilter(RequestIdFilter())
+        queue_handler.addFilter(RateLimitFilter())
+        logger.addHandler(queue_handler)
+
+        listener = QueueListener(queue_handler.queue, file_handler, console_handler)
+        listener.start()
+        atexit.register(listener.stop)
+    else:
+        for handler in (file_handler, console_handler):
+            handler.addFilter(RequestIdFilter())
+            handler.addFilter(RateLimitFilter())
+            logger.addHandler(handler)
 
 # Test print
 logger.debug(f"Logger initialized. Logging to {LOG_PATH}")
@@ -1,10 +1,59 @@
+import os
+import threading
+import time
+
 from fastapi import APIRouter, Response
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import REGISTRY, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import multiprocess
 
 router = APIRouter()
 
+# Set (and emptied) by entrypoint.sh when uvicorn runs more than one worker
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+# Reuse rendered output for this long; keep it below the scrape interval
+CACHE_TTL = float(os.getenv("METRICS_CACHE_TTL", 5))
+
+
+def _build_registry():
+    """
+    Single worker: the default per-process registry.
+    Several workers: one registry merging every worker's metric files.
+    """
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+_registry = _build_registry()
+_lock = threading.Lock()
+_cached = (0.0, b"")  # (expires_at, payload)
+
+
+def render_metrics() -> bytes:
+    """Exposition text, re-rendered at most once per CACHE_TTL."""
+    global _cached
+    expires_at, payload = _cached
+    if time.monotonic() < expires_at:
+        return payload
+
+    with _lock:
+        # Another scrape may have refreshed it while we waited
+        expires_at, payload = _cached
+        if time.monotonic() < expires_at:
+            return payload
+        payload = generate_latest(_registry)
+        _cached = (time.monotonic() + CACHE_TTL, payload)
+        return payload
+
+
+def mark_worker_dead():
+    """Drop this worker's live gauges from the shared directory on shutdown."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
 @router.get("/metrics")
 def metrics():
-    data = generate_latest()
-    return Response(content=data, media_type=CONTENT_TYPE_LATEST)
-
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
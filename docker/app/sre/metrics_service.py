@@ -1,6 +1,15 @@
 # sre/metrics_service.py
+import os
 from prometheus_client import Counter, Histogram, Gauge
 
+# Request latency buckets in seconds, e.g. METRICS_LATENCY_BUCKETS="0.01,0.05,0.1,0.5,1"
+LATENCY_BUCKETS = tuple(
+    float(b) for b in os.getenv(
+        "METRICS_LATENCY_BUCKETS",
+        "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10",
+    ).split(",")
+)
+
 # ---------------- Counters ----------------
 weather_requests_total = Counter(
     "weather_requests_total",
@@ -16,16 +25,177 @@ failed_weather_requests_total = Counter(
     "Total failed weather API requests",
     ["status_code"]
 )
+weather_cache_hits_total = Counter(
+    "weather_cache_hits_total",
+    "Weather lookups served from cache"
+)
+weather_cache_misses_total = Counter(
+    "weather_cache_misses_total",
+    "Weather lookups that went upstream"
+)
+weather_cache_stale_total = Counter(
+    "weather_cache_stale_total",
+    "Weather lookups that found an expired cache entry"
+)
+weather_cache_evictions_total = Counter(
+    "weather_cache_evictions_total",
+    "Weather cache entries evicted to respect the LRU size bound"
+)
+weather_coalesced_waiters_total = Counter(
+    "weather_coalesced_waiters_total",
+    "Weather lookups that joined an in-flight upstream call instead of making their own"
+)
+weather_shared_cache_hits_total = Counter(
+    "weather_shared_cache_hits_total",
+    "Weather lookups found in the host-wide shared cache"
+)
+weather_shared_cache_errors_total = Counter(
+    "weather_shared_cache_errors_total",
+    "Shared weather cache reads/writes that failed"
+)
+weather_stale_served_total = Counter(
+    "weather_stale_served_total",
+    "Weather lookups answered with a stale entry while a refresh ran"
+)
 
 # ---------------- Histograms ----------------
 request_latency_seconds = Histogram(
     "request_latency_seconds",
     "Time spent processing requests",
-    ["endpoint"]
+    ["endpoint", "method", "status_class"],
+    buckets=LATENCY_BUCKETS
+)
+weather_prefetch_batch_seconds = Histogram(
+    "weather_prefetch_batch_seconds",
+    "Time spent refreshing one prefetch batch of subscribed cities"
+)
+weather_prefetch_lag_seconds = Histogram(
+    "weather_prefetch_lag_seconds",
+    "How long a subscribed city had been due for refresh when the prefetcher reached it"
 )
 
 # ---------------- Gauges ----------------
-active_users = Gauge("active_users", "Number of currently active users")
-cpu_percent = Gauge("cpu_percent", "CPU usage percent")
-memory_percent = Gauge("memory_percent", "Memory usage percent")
-disk_percent = Gauge("disk_percent", "Disk usage percent")
+# multiprocess_mode only matters with PROMETHEUS_MULTIPROC_DIR set:
+# host readings keep the most recent sample, per-worker counts are summed.
+active_users = Gauge("active_users", "Number of currently active users", multiprocess_mode="livesum")
+cpu_percent = Gauge("cpu_percent", "CPU usage percent", multiprocess_mode="mostrecent")
+memory_percent = Gauge("memory_percent", "Memory usage percent", multiprocess_mode="mostrecent")
+disk_percent = Gauge("disk_percent", "Disk usage percent", multiprocess_mode="mostrecent")
+load_average_1m = Gauge("load_average_1m", "1-minute load average", multiprocess_mode="mostrecent")
+open_fds = Gauge("open_fds", "Open file descriptors of the app process", multiprocess_mode="livesum")
+network_bytes_per_second = Gauge(
+    "network_bytes_per_second",
+    "Host network throughput (sent + received)",
+    multiprocess_mode="mostrecent"
+)
+
+# ---------------- Weather upstream ----------------
+weather_upstream_pool_size = Gauge(
+    "weather_upstream_pool_size",
+    "Max keep-alive connections in the OpenWeather client pool",
+    multiprocess_mode="livesum"
+)
+weather_upstream_in_flight = Gauge(
+    "weather_upstream_in_flight",
+    "OpenWeather requests currently in flight",
+    multiprocess_mode="livesum"
+)
+weather_upstream_wait_seconds = Histogram(
+    "weather_upstream_wait_seconds",
+    "Time spent waiting for a free OpenWeather connection slot"
+)
+weather_upstream_retries_total = Counter(
+    "weather_upstream_retries_total",
+    "OpenWeather requests retried after a transient failure"
+)
+
+# ---------------- DB connection pool ----------------
+db_pool_size = Gauge(
+    "db_pool_size",
+    "Configured persistent connections in the DB pool",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out",
+    "DB connections currently checked out of the pool",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+db_pool_overflow = Gauge(
+    "db_pool_overflow",
+    "DB connections open beyond the pool size",
+    ["engine"],
+    multiprocess_mode="livesum"
+)
+db_pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting to check a connection out of the DB pool",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+)
+db_pool_timeouts_total = Counter(
+    "db_pool_timeouts_total",
+    "DB pool checkouts that gave up after DB_POOL_TIMEOUT",
+    ["engine"]
+)
+db_pool_invalidations_total = Counter(
+    "db_pool_invalidations_total",
+    "DB connections invalidated (dropped or failed pre-ping)",
+    ["engine"]
+)
+
+# ---------------- Alerting ----------------
+alerts_enqueued_total = Counter(
+    "alerts_enqueued_total",
+    "Alerts accepted onto the dispatch queue"
+)
+alerts_suppressed_total = Counter(
+    "alerts_suppressed_total",
+    "Alerts folded into an earlier one with the same fingerprint"
+)
+alerts_dropped_total = Counter(
+    "alerts_dropped_total",
+    "Alerts dropped because the dispatch queue was full"
+)
+alert_deliveries_total = Counter(
+    "alert_deliveries_total",
+    "Alert digests delivered, by channel and result",
+    ["channel", "result"]
+)
+
+# ---------------- Subscriber weather alerts ----------------
+subscriber_alert_stage_seconds = Histogram(
+    "subscriber_alert_stage_seconds",
+    "Time spent in each stage of a subscriber-alert cycle (load, fetch, evaluate, deliver)",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+subscriber_alert_subscriptions = Gauge(
+    "subscriber_alert_subscriptions",
+    "Subscriptions evaluated in the last subscriber-alert cycle",
+    multiprocess_mode="mostrecent"
+)
+subscriber_alerts_total = Counter(
+    "subscriber_alerts_total",
+    "Subscriber notifications, by channel and result",
+    ["channel", "result"]
+)
+
+# ---------------- Page rendering ----------------
+render_cache_hits_total = Counter(
+    "render_cache_hits_total",
+    "HTML pages served from the rendered-page cache"
+)
+render_cache_misses_total = Counter(
+    "render_cache_misses_total",
+    "HTML pages rendered from a template"
+)
+
+# ---------------- Startup ----------------
+startup_phase_seconds = Gauge(
+    "startup_phase_seconds",
+    "Duration of each container bootstrap phase before the app started",
+    ["stage", "phase"],
+    multiprocess_mode="mostrecent"
+)
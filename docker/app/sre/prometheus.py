@@ -1,15 +1,69 @@
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from sre.metrics_service import request_latency_seconds
+# app/sre/prometheus.py
+import os
 import time
 
-class PrometheusMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start = time.time()
-        response = await call_next(request)
-        duration = time.time() - start
+from sre.metrics_service import request_latency_seconds
+
+# Hard cap on distinct (endpoint, method, status_class) series; overflow is
+# folded into endpoint="<other>" (can be adjusted via env vars)
+MAX_SERIES = int(os.getenv("METRICS_MAX_SERIES", 500))
+
+UNMATCHED = "<unmatched>"
+OTHER = "<other>"
+
+
+class PrometheusMiddleware:
+    """
+    Pure ASGI request-latency middleware.
+    Labels by matched route template (`/preferences/{user_id}`, not
+    `/preferences/123`), HTTP method and status class (2xx, 4xx, ...),
+    timed with a monotonic clock. No per-request task or body streaming.
+    """
+
+    def __init__(self, app, max_series: int = MAX_SERIES):
+        self.app = app
+        self.max_series = max_series
+        self._series = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        root_path = scope.get("root_path", "")
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            labels = self._labels(
+                self._endpoint(scope, root_path), scope["method"], f"{status_code // 100}xx"
+            )
+            request_latency_seconds.labels(*labels).observe(time.perf_counter() - start)
 
-        endpoint = request.url.path
-        request_latency_seconds.labels(endpoint=endpoint).observe(duration)
-        return response
+    @staticmethod
+    def _endpoint(scope, root_path: str) -> str:
+        # The router writes the matched route into the shared scope dict
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        mount_path = scope.get("root_path", "")
+        if mount_path != root_path:
+            return f"{mount_path}/{{path}}"
+        return UNMATCHED
 
+    def _labels(self, endpoint: str, method: str, status_class: str) -> tuple:
+        labels = (endpoint, method, status_class)
+        if labels in self._series:
+            return labels
+        if len(self._series) < self.max_series:
+            self._series.add(labels)
+            return labels
+        return (OTHER, method, status_class)
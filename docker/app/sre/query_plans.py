@@ -0,0 +1,80 @@
+# app/sre/query_plans.py
+
+import json
+import os
+import re
+import sys
+
+from sqlalchemy import create_engine, text
+
+# allow importing logger from the same folder
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from logger import logger
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+# Hot queries that must be answered from an index, never a full table scan.
+# Literal values keep the SQL identical on Postgres and SQLite.
+HOT_QUERIES = {
+    "preferences_by_user": "SELECT id, user_id, city, alert_type FROM preferences WHERE user_id = 1",
+    "preference_upsert_target": "SELECT id FROM preferences WHERE user_id = 1 AND city = 'lagos'",
+    "preferences_keyset_page": (
+        "SELECT id, user_id, city, alert_type FROM preferences "
+        "WHERE user_id = 1 AND id > 100 ORDER BY id LIMIT 51"
+    ),
+    "user_by_email": "SELECT id FROM weatherusers WHERE email = 'probe@example.com'",
+}
+
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (TABLE )?(\w+)")
+
+
+def _postgres_seq_scans(node: dict) -> list:
+    tables = []
+    if node.get("Node Type") == "Seq Scan":
+        tables.append(node.get("Relation Name"))
+    for child in node.get("Plans", []):
+        tables.extend(_postgres_seq_scans(child))
+    return tables
+
+
+def full_scans(conn, sql: str) -> list:
+    """Tables `sql` would read with a full scan on this connection."""
+    if conn.dialect.name == "postgresql":
+        # Tiny tables make seq scans genuinely cheaper; take that choice
+        # away so only a missing index can produce one.
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return _postgres_seq_scans(plan[0]["Plan"])
+
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return [m.group(2) for *_, detail in rows if (m := SQLITE_FULL_SCAN.match(detail))]
+
+
+def check_query_plans(engine):
+    """Raise if any hot query stops using an index."""
+    failures = []
+    with engine.connect() as conn:
+        for name, sql in HOT_QUERIES.items():
+            with conn.begin():
+                scanned = full_scans(conn, sql)
+            if scanned:
+                failures.append(f"{name} scans {', '.join(scanned)}")
+
+    if failures:
+        raise RuntimeError(f"Query plan regression: {'; '.join(failures)}")
+
+    logger.info(f"✅ Query plans OK ({len(HOT_QUERIES)} hot queries indexed)")
+
+
+def main():
+    try:
+        check_query_plans(create_engine(DATABASE_URL))
+    except Exception as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# app/sre/readiness.py
+import os
+import sys
+import threading
+import time
+
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from logger import logger
+from verify_startup import check_migrations
+from db import engine, is_sqlite
+
+# Readiness tuning (can be adjusted via env vars)
+CHECK_INTERVAL = float(os.getenv("READY_CHECK_INTERVAL", 5))     # seconds between DB pings
+MAX_STALENESS = float(os.getenv("READY_MAX_STALENESS", 30))     # older results count as not ready
+
+
+class ReadinessChecker:
+    """
+    Background readiness state.
+    The Alembic head is checked once at start; DB connectivity is pinged
+    every CHECK_INTERVAL seconds on the app's own engine pool.
+    The probe only reads the cached result and reports its age.
+    """
+
+    def __init__(self, interval: float = CHECK_INTERVAL, max_staleness: float = MAX_STALENESS):
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self._migrations_error = None
+        self._db_error = "DB not checked yet"
+        self._checked_at = None  # monotonic
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        if is_sqlite:
+            logger.info("Readiness migrations check skipped (SQLite fallback) ✅")
+        else:
+            try:
+                check_migrations(engine)
+            except Exception as exc:
+                self._migrations_error = str(exc)
+                logger.error(f"Readiness migrations check FAILED ❌: {exc}")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="readiness-checker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.check_db()
+            self._stop.wait(self.interval)
+
+    def check_db(self):
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            if self._db_error is not None:
+                logger.info("Readiness DB check OK ✅")
+            self._db_error = None
+        except Exception as exc:
+            if self._db_error is None:
+                logger.error(f"Readiness DB check FAILED ❌: {exc}")
+            self._db_error = str(exc)
+        self._checked_at = time.monotonic()
+
+    def state(self) -> dict:
+        """Cached readiness; never touches the database."""
+        age = None if self._checked_at is None else time.monotonic() - self._checked_at
+        stale = age is None or age > self.max_staleness
+
+        if self._migrations_error:
+            error = self._migrations_error
+        elif self._db_error:
+            error = self._db_error
+        elif stale:
+            error = f"Readiness result is stale ({age:.1f}s old)"
+        else:
+            error = None
+
+        return {
+            "ready": error is None,
+            "error": error,
+            "age_seconds": None if age is None else round(age, 3),
+            "stale": stale,
+        }
+
+
+readiness = ReadinessChecker()
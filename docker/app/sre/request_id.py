@@ -0,0 +1,41 @@
+# app/sre/request_id.py
+import re
+import uuid
+
+from sre.logger import request_id_var
+
+HEADER = b"x-request-id"
+
+# Accept a caller-supplied id only if it is short and printable
+_VALID = re.compile(rb"^[A-Za-z0-9._:-]{1,64}$")
+
+
+class RequestIdMiddleware:
+    """
+    Pure ASGI middleware giving every request an id.
+    Reuses a valid incoming X-Request-ID, otherwise generates one; the id is
+    set on the logging context var (so every log line in the request carries
+    it) and echoed back in the X-Request-ID response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(HEADER, b"")
+        request_id = incoming if _VALID.match(incoming) else uuid.uuid4().hex.encode()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (HEADER, request_id)]
+            await send(message)
+
+        token = request_id_var.set(request_id.decode())
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
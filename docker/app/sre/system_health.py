@@ -2,13 +2,12 @@
 import os
 import sys
 from fastapi import APIRouter, status
-from fastapi.responses import JSONResponse
-import psutil
 
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 from logger import logger
 from send_alert import send_alert
-from sre.metrics_service import cpu_percent, memory_percent, disk_percent
+from sre.system_sampler import sampler, MONITOR_PATH
+from responses import FastJSONResponse
 
 router = APIRouter()
 
@@ -16,32 +15,27 @@ router = APIRouter()
 CPU_THRESHOLD = float(os.getenv("SYS_CPU_THRESHOLD", 85))       # percent
 MEM_THRESHOLD = float(os.getenv("SYS_MEM_THRESHOLD", 90))       # percent
 DISK_THRESHOLD = float(os.getenv("SYS_DISK_THRESHOLD", 90))     # percent
-MONITOR_PATH = os.getenv("SYS_DISK_PATH", "/tmp")               # path to monitor disk
 
 @router.get("/health/system")
 def system_health():
     """
     System-level health probe.
-    Checks CPU, memory, and disk usage.
+    Checks CPU, memory, and disk usage from the latest background sample.
     Triggers alert if any thresholds are breached.
     """
-    cpu = psutil.cpu_percent(interval=0.5)
-    mem = psutil.virtual_memory()
-    disk = psutil.disk_usage(MONITOR_PATH)
-
-    cpu_percent.set(cpu)
-    memory_percent.set(mem.percent)
-    disk_percent.set(disk.percent)
-    router = APIRouter()
+    snapshot = sampler.latest()
+    cpu = snapshot["cpu_percent"]
+    mem = snapshot["memory_percent"]
+    disk = snapshot["disk_percent"]
 
     alerts = []
 
     if cpu > CPU_THRESHOLD:
         alerts.append(f"High CPU usage: {cpu:.1f}% (>{CPU_THRESHOLD}%)")
-    if mem.percent > MEM_THRESHOLD:
-        alerts.append(f"High Memory usage: {mem.percent:.1f}% (>{MEM_THRESHOLD}%)")
-    if disk.percent > DISK_THRESHOLD:
-        alerts.append(f"High Disk usage ({MONITOR_PATH}): {disk.percent:.1f}% (>{DISK_THRESHOLD}%)")
+    if mem > MEM_THRESHOLD:
+        alerts.append(f"High Memory usage: {mem:.1f}% (>{MEM_THRESHOLD}%)")
+    if disk > DISK_THRESHOLD:
+        alerts.append(f"High Disk usage ({MONITOR_PATH}): {disk:.1f}% (>{DISK_THRESHOLD}%)")
 
     if alerts:
         message = " | ".join(alerts)
@@ -50,18 +44,23 @@ def system_health():
         status_code = status.HTTP_503_SERVICE_UNAVAILABLE
         health_status = "unhealthy"
     else:
-        logger.info(f"System Health OK ✅: CPU={cpu:.1f}%, Mem={mem.percent:.1f}%, Disk={disk.percent:.1f}%")
+        logger.info(f"System Health OK ✅: CPU={cpu:.1f}%, Mem={mem:.1f}%, Disk={disk:.1f}%")
         message = "System OK ✅"
         status_code = status.HTTP_200_OK
         health_status = "healthy"
 
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status_code,
         content={
             "status": health_status,
             "cpu_percent": cpu,
-            "memory_percent": mem.percent,
-            "disk_percent": disk.percent,
+            "memory_percent": mem,
+            "disk_percent": disk,
+            "load_1m": snapshot["load_1m"],
+            "open_fds": snapshot["open_fds"],
+            "net_bytes_per_second": snapshot["net_bytes_per_second"],
+            "sampled_at": snapshot["timestamp"],
+            "window": sampler.summary(),
             "message": message
         }
     )
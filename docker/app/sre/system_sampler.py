@@ -0,0 +1,121 @@
+# app/sre/system_sampler.py
+import os
+import threading
+import time
+from collections import deque
+
+import psutil
+
+from sre.metrics_service import (
+    cpu_percent,
+    memory_percent,
+    disk_percent,
+    load_average_1m,
+    open_fds,
+    network_bytes_per_second,
+)
+
+# Sampling tuning (can be adjusted via env vars)
+SAMPLE_INTERVAL = float(os.getenv("SYS_SAMPLE_INTERVAL", 5))   # seconds between samples
+SAMPLE_WINDOW = int(os.getenv("SYS_SAMPLE_WINDOW", 60))        # samples kept (5 min at 5 s)
+MONITOR_PATH = os.getenv("SYS_DISK_PATH", "/tmp")              # path to monitor disk
+
+# Readings summarised over the window
+SUMMARY_FIELDS = ("cpu_percent", "memory_percent", "disk_percent", "load_1m", "open_fds")
+
+
+def _percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class SystemSampler:
+    """
+    One daemon thread samples host and process readings every
+    SAMPLE_INTERVAL seconds into a ring buffer and updates the gauges.
+    Readers (health probes, dashboards) only touch memory.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, window: int = SAMPLE_WINDOW,
+                 path: str = MONITOR_PATH):
+        self.interval = interval
+        self.path = path
+        self._samples = deque(maxlen=window)
+        self._process = psutil.Process()
+        self._last_net = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        psutil.cpu_percent(interval=None)  # prime: the first non-blocking call returns 0.0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="system-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def sample(self) -> dict:
+        """Take one reading, store it and publish it to the gauges."""
+        now = time.monotonic()
+        net = psutil.net_io_counters()
+        net_rate = 0.0
+        if self._last_net is not None:
+            last_at, last_bytes = self._last_net
+            net_rate = (net.bytes_sent + net.bytes_recv - last_bytes) / max(now - last_at, 1e-6)
+        self._last_net = (now, net.bytes_sent + net.bytes_recv)
+
+        snapshot = {
+            "timestamp": time.time(),
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "memory_percent": psutil.virtual_memory().percent,
+            "disk_percent": psutil.disk_usage(self.path).percent,
+            "load_1m": os.getloadavg()[0],
+            "open_fds": self._process.num_fds(),
+            "net_bytes_per_second": net_rate,
+        }
+        self._samples.append(snapshot)
+
+        cpu_percent.set(snapshot["cpu_percent"])
+        memory_percent.set(snapshot["memory_percent"])
+        disk_percent.set(snapshot["disk_percent"])
+        load_average_1m.set(snapshot["load_1m"])
+        open_fds.set(snapshot["open_fds"])
+        network_bytes_per_second.set(net_rate)
+        return snapshot
+
+    def latest(self) -> dict:
+        """Most recent reading; samples inline only before the first one exists."""
+        if not self._samples:
+            return self.sample()
+        return self._samples[-1]
+
+    def summary(self) -> dict:
+        """Mean, p50 and p95 of each reading over the window."""
+        samples = list(self._samples)
+        if not samples:
+            return {}
+
+        summary = {"samples": len(samples), "window_seconds": len(samples) * self.interval}
+        for field in SUMMARY_FIELDS:
+            values = sorted(s[field] for s in samples)
+            summary[field] = {
+                "avg": round(sum(values) / len(values), 2),
+                "p50": _percentile(values, 0.50),
+                "p95": _percentile(values, 0.95),
+            }
+        return summary
+
+
+sampler = SystemSampler()
@@ -13,6 +13,7 @@ from alembic.runtime.migration import MigrationContext
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 from logger import logger
 from send_alert import send_alert
+from query_plans import check_query_plans
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
 FINAL_DB_MODE = os.environ.get("FINAL_DB_MODE")
@@ -20,11 +21,11 @@ FINAL_DB_MODE = os.environ.get("FINAL_DB_MODE")
 if not DATABASE_URL or not FINAL_DB_MODE:
     print("[VERIFY STARTUP] Env Variables NOT fully detected")
 
-def check_db():
-    """Check database connectivity"""
+def check_db(engine=None):
+    """Check database connectivity (on `engine` if given, else a fresh one)"""
     start = time.time()
     try:
-        engine = create_engine(DATABASE_URL)
+        engine = engine or create_engine(DATABASE_URL)
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
         logger.info(f"✅ DB connectivity OK ({time.time() - start:.2f}s)")
@@ -36,8 +37,8 @@ def check_db():
             raise
 
 
-def check_migrations():
-    """Check Alembic migrations"""
+def check_migrations(engine=None):
+    """Check Alembic migrations (on `engine` if given, else a fresh one)"""
     # Skip migrations check if using SQLite fallback
     if FINAL_DB_MODE in ("sqlite_only", "try_postgres"):
         if DATABASE_URL.startswith("sqlite"):
@@ -48,7 +49,7 @@ def check_migrations():
     alembic_cfg = Config("alembic.ini")
     script = ScriptDirectory.from_config(alembic_cfg)
 
-    engine = create_engine(DATABASE_URL)
+    engine = engine or create_engine(DATABASE_URL)
     with engine.connect() as conn:
         context = MigrationContext.configure(conn)
         current_rev = context.get_current_revision()
@@ -62,8 +63,10 @@ def check_migrations():
 
 def run_startup_checks():
     """Run all startup checks"""
-    check_db()
-    check_migrations()
+    engine = create_engine(DATABASE_URL)
+    check_db(engine)
+    check_migrations(engine)
+    check_query_plans(engine)
 
 
 def main():
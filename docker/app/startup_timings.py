@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Per-stage startup timings.
+Bootstrap scripts run as separate processes before uvicorn, so each one
+records its phases into a small JSON file; the app publishes them as the
+`startup_phase_seconds` gauge once it is up.
+"""
+
+import json
+import os
+
+TIMINGS_PATH = os.getenv("STARTUP_TIMINGS_PATH", "/tmp/edgepaas/startup_timings.json")
+
+
+def reset():
+    """Start a fresh record; called by the first bootstrap stage."""
+    try:
+        os.remove(TIMINGS_PATH)
+    except FileNotFoundError:
+        pass
+
+
+def load() -> dict:
+    """{stage: {phase: seconds}}; empty when nothing was recorded."""
+    try:
+        with open(TIMINGS_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record(stage: str, timings: dict):
+    """Merge `timings` for `stage` into the file. Never fails the caller."""
+    try:
+        os.makedirs(os.path.dirname(TIMINGS_PATH), exist_ok=True)
+        recorded = load()
+        recorded[stage] = timings
+        with open(TIMINGS_PATH, "w") as f:
+            json.dump(recorded, f)
+    except OSError as e:
+        print(f"[STARTUP_TIMINGS] Could not record {stage}: {e}")
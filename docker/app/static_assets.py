@@ -0,0 +1,119 @@
+# static_assets.py
+import json
+import mimetypes
+import os
+
+from compression import accepted_encoding
+from build_static import STATIC_DIR, STATIC_DIST_DIR, MANIFEST, content_hash
+
+IMMUTABLE = b"public, max-age=31536000, immutable"
+REVALIDATE = b"no-cache"
+
+# Precompressed sibling suffix per Content-Encoding, in preference order
+VARIANT_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+class _Asset:
+    __slots__ = ("media_type", "cache_control", "bodies", "etags")
+
+    def __init__(self, media_type: str, cache_control: bytes, digest: str, bodies: dict):
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.bodies = bodies  # encoding ("" = identity) -> bytes
+        # Strong ETag per representation: the content hash, plus the encoding
+        self.etags = {enc: f'"{digest}-{enc}"'.encode() if enc else f'"{digest}"'.encode() for enc in bodies}
+
+
+class StaticAssets:
+    """
+    ASGI app mounted at /static.
+    Everything is read into memory once at startup, so a hit never touches
+    the filesystem. Fingerprinted names from build_static.py
+    (`style.<hash>.css`) are served with an immutable, year-long
+    Cache-Control and their prebuilt .br / .gz variant when accepted;
+    original names still work but are revalidated (ETag, 304).
+    `url()` is exposed to templates as `static_url`.
+    """
+
+    def __init__(self, directory: str = STATIC_DIR, dist_directory: str = STATIC_DIST_DIR,
+                 mount_path: str = "/static"):
+        self.mount_path = mount_path
+        self.manifest = self._load_manifest(dist_directory)
+        self._assets = {}
+
+        for name, hashed in self.manifest.items():
+            bodies = {}
+            base = os.path.join(dist_directory, hashed)
+            with open(base, "rb") as f:
+                bodies[""] = f.read()
+            for encoding, suffix in VARIANT_SUFFIXES.items():
+                if os.path.exists(base + suffix):
+                    with open(base + suffix, "rb") as f:
+                        bodies[encoding] = f.read()
+            media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            digest = content_hash(bodies[""])
+            self._assets[hashed] = _Asset(media_type, IMMUTABLE, digest, bodies)
+            self._assets[name] = _Asset(media_type, REVALIDATE, digest, bodies)
+
+        # Anything the build did not cover (or no build at all): plain names only
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, directory).replace(os.sep, "/")
+                if name in self._assets:
+                    continue
+                with open(path, "rb") as f:
+                    data = f.read()
+                media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                self._assets[name] = _Asset(media_type, REVALIDATE, content_hash(data), {"": data})
+
+    @staticmethod
+    def _load_manifest(dist_directory: str) -> dict:
+        try:
+            with open(os.path.join(dist_directory, MANIFEST)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # No build step run (local dev): plain names only
+            return {}
+
+    def url(self, name: str) -> str:
+        """Public URL for a file under static/, fingerprinted when built."""
+        return f"{self.mount_path}/{self.manifest.get(name, name)}"
+
+    async def __call__(self, scope, receive, send):
+        path = scope["path"][len(scope.get("root_path", "")):].lstrip("/")
+        if scope["method"] not in ("GET", "HEAD"):
+            await self._send(send, 405, [(b"allow", b"GET, HEAD")], b"Method Not Allowed")
+            return
+
+        asset = self._assets.get(path)
+        if asset is None:
+            await self._send(send, 404, [], b"Not Found")
+            return
+
+        request_headers = dict(scope["headers"])
+        available = tuple(enc for enc in VARIANT_SUFFIXES if enc in asset.bodies)
+        encoding = accepted_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"), available)
+        etag = asset.etags[encoding]
+
+        headers = [
+            (b"etag", etag),
+            (b"cache-control", asset.cache_control),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        if_none_match = request_headers.get(b"if-none-match", b"")
+        if etag in if_none_match or if_none_match.strip() == b"*":
+            await self._send(send, 304, headers, b"")
+            return
+
+        body = asset.bodies[encoding]
+        headers.append((b"content-type", asset.media_type.encode()))
+        if encoding:
+            headers.append((b"content-encoding", encoding.encode()))
+        await self._send(send, 200, headers, b"" if scope["method"] == "HEAD" else body, len(body))
+
+    @staticmethod
+    async def _send(send, status: int, headers: list, body: bytes, length: int = None):
+        headers = [*headers, (b"content-length", str(len(body) if length is None else length).encode())]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -5,10 +5,14 @@ Modes:
 - sqlite_only: use SQLite, skip Postgres
 - postgres_only: use Postgres only
 - try_postgres: try Postgres first, fallback to SQLite
+
+Importable: bootstrap.py calls resolve_database() in-process;
+running this file directly keeps the old script behaviour.
 """
 
 import os
-import subprocess
+import time
+import startup_timings
 from wait_for_db_core import wait_for_database
 from local_tz import timer
 
@@ -16,7 +20,9 @@ FINAL_DB_MODE = os.getenv("FINAL_DB_MODE")
 DATABASE_URL = os.getenv("DATABASE_URL")
 SQLITE_FALLBACK = os.getenv("DATABASE_URL_SQLITE", "sqlite:////tmp/edgepaas/fallback.db")
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", 6))
-RETRY_INTERVAL = int(os.getenv("RETRY_INTERVAL", 3))
+RETRY_INTERVAL = int(os.getenv("RETRY_INTERVAL", 3))  # cap on the backoff between attempts
+WAIT_DB_DEADLINE = float(os.getenv("WAIT_DB_DEADLINE", MAX_RETRIES * RETRY_INTERVAL))
+DB_ENV_FILE = "/tmp/db_env.sh"
 
 def is_postgres(url: str) -> bool:
     return url and url.startswith("postgresql://")
@@ -35,56 +41,83 @@ def add_sslmode(url: str) -> str:
     new_query = urlencode(query, doseq=True)
     return urlunparse(parsed._replace(query=new_query))
 
-print(f"[{timer()}] [WAIT] DB mode: {FINAL_DB_MODE}")
+def resolve_database() -> dict:
+    """
+    Decide the database for this container and export it to os.environ.
+    Returns {"database_url", "run_migrations", "final_db_mode", "timings"}.
+    """
+    print(f"[{timer()}] [WAIT] DB mode: {FINAL_DB_MODE}")
+    started = time.monotonic()
+    wait_timings = {}
 
-final_db_url = None
+    final_db_url = None
 
-if FINAL_DB_MODE == "sqlite_only":
-    final_db_url = SQLITE_FALLBACK
-    run_migrations = "false"
-    print(f"[{timer()}] [DB] Using SQLite only: {final_db_url}")
+    if FINAL_DB_MODE == "sqlite_only":
+        final_db_url = SQLITE_FALLBACK
+        print(f"[{timer()}] [DB] Using SQLite only: {final_db_url}")
 
-elif FINAL_DB_MODE == "postgres_only":
-    if not DATABASE_URL:
-        raise RuntimeError("DATABASE_URL must be set for Postgres mode")
-    try:
-        wait_for_database(add_sslmode(DATABASE_URL), MAX_RETRIES, RETRY_INTERVAL)
-        final_db_url = DATABASE_URL
-        run_migrations = "true"
-        print(f"[{timer()}] [DB] Connected to PostgreSQL: {final_db_url}")
-    except RuntimeError as e:
-        raise RuntimeError(f"[{timer()}] PostgreSQL unreachable: {e}")
-
-elif FINAL_DB_MODE == "try_postgres":
+    elif FINAL_DB_MODE == "postgres_only":
+        if not DATABASE_URL:
+            raise RuntimeError("DATABASE_URL must be set for Postgres mode")
+        try:
+            wait_timings = wait_for_database(
+                add_sslmode(DATABASE_URL), MAX_RETRIES, RETRY_INTERVAL, deadline=WAIT_DB_DEADLINE
+            )
+            final_db_url = DATABASE_URL
+            print(f"[{timer()}] [DB] Connected to PostgreSQL: {final_db_url}")
+        except RuntimeError as e:
+            raise RuntimeError(f"[{timer()}] PostgreSQL unreachable: {e}")
+
+    elif FINAL_DB_MODE == "try_postgres":
+        try:
+            wait_timings = wait_for_database(
+                add_sslmode(DATABASE_URL), MAX_RETRIES, RETRY_INTERVAL, deadline=WAIT_DB_DEADLINE
+            )
+            final_db_url = DATABASE_URL
+            print(f"[{timer()}] [DB] Connected to PostgreSQL: {final_db_url}")
+        except RuntimeError:
+            final_db_url = SQLITE_FALLBACK
+            print(f"[{timer()}] [WARN] PostgreSQL unreachable. Falling back to SQLite: {final_db_url}")
+
+    else:
+        raise RuntimeError(f"Unknown FINAL_DB_MODE={FINAL_DB_MODE}")
+
+    # validate just to be sure
+    run_migrations = "true" if final_db_url.startswith("postgresql://") else "false"
+    final_db_mode = "sqlite_only" if run_migrations == "false" else FINAL_DB_MODE
+
+    # Export final for subsequent stages
+    os.environ["DATABASE_URL"] = final_db_url
+    os.environ["RUN_MIGRATIONS"] = run_migrations
+    os.environ["FINAL_DB_MODE"] = final_db_mode
+
+    wait_timings["total_seconds"] = round(time.monotonic() - started, 3)
+    return {
+        "database_url": final_db_url,
+        "run_migrations": run_migrations,
+        "final_db_mode": final_db_mode,
+        "timings": wait_timings,
+    }
+
+def write_env_file(resolved: dict):
+    """Write the decision for shell consumers (entrypoint, debugging)."""
     try:
-        wait_for_database(add_sslmode(DATABASE_URL), MAX_RETRIES, RETRY_INTERVAL)
-        final_db_url = DATABASE_URL
-        run_migrations = "true"
-        print(f"[{timer()}] [DB] Connected to PostgreSQL: {final_db_url}")
-    except RuntimeError:
-        final_db_url = SQLITE_FALLBACK
-        run_migrations = "false"
-        print(f"[{timer()}] [WARN] PostgreSQL unreachable. Falling back to SQLite: {final_db_url}")
-
-else:
-    raise RuntimeError(f"Unknown FINAL_DB_MODE={FINAL_DB_MODE}")
-
-# Export final for subsequent scripts
-os.environ["DATABASE_URL"] = final_db_url
-
-# validate just to be sure
-run_migrations = "true" if final_db_url.startswith("postgresql://") else "false"
-final_db_mode = "sqlite_only" if run_migrations == "false" else FINAL_DB_MODE
-
-# Write the export file
-try:
-    with open("/tmp/db_env.sh", "w") as f:
-        f.write(f"export DATABASE_URL='{final_db_url}'\n")
-        f.write(f"export RUN_MIGRATIONS='{run_migrations}'\n")
-        f.write(f"export FINAL_DB_MODE='{final_db_mode}'\n")
-except Exception as e:
-    print(f"[ERROR] ❌ Failed to write /tmp/db_env.sh: {e}")
-    raise
-print("[WAIT] Wrote /tmp/db_env.sh successfully")
-
-print(f"[{timer()}] [DONE] Database ready: {final_db_url}")
+        with open(DB_ENV_FILE, "w") as f:
+            f.write(f"export DATABASE_URL='{resolved['database_url']}'\n")
+            f.write(f"export RUN_MIGRATIONS='{resolved['run_migrations']}'\n")
+            f.write(f"export FINAL_DB_MODE='{resolved['final_db_mode']}'\n")
+    except Exception as e:
+        print(f"[ERROR] ❌ Failed to write {DB_ENV_FILE}: {e}")
+        raise
+    print(f"[WAIT] Wrote {DB_ENV_FILE} successfully")
+
+def main():
+    # First bootstrap stage: start a fresh timing record
+    startup_timings.reset()
+    resolved = resolve_database()
+    write_env_file(resolved)
+    startup_timings.record("wait_for_db", resolved["timings"])
+    print(f"[{timer()}] [DONE] Database ready: {resolved['database_url']}")
+
+if __name__ == "__main__":
+    main()
@@ -2,30 +2,116 @@
 """
 Core DB wait logic.
 PostgreSQL ONLY.
+
+Adaptive waiter:
+- exponential backoff with jitter, capped at `retry_interval`
+- per-attempt libpq connect_timeout, never past the overall deadline
+- optional TCP reachability probe raced against the handshake, so a
+  blackholed or refused host fails in WAIT_DB_TCP_TIMEOUT, not connect_timeout
+Returns per-phase timings (seconds).
 """
 
+import os
+import random
+import socket
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlparse
+
 import psycopg2
 from local_tz import timer
 
-def wait_for_database(db_url: str, max_retries: int = 5, retry_interval: int = 3) -> None:
-    start = time.time()
+# Tuning (can be adjusted via env vars)
+BACKOFF_INITIAL = float(os.getenv("WAIT_DB_BACKOFF_INITIAL", 0.25))  # first retry delay, doubles each attempt
+CONNECT_TIMEOUT = int(os.getenv("WAIT_DB_CONNECT_TIMEOUT", 5))       # seconds per handshake (libpq minimum 2)
+TCP_PROBE = os.getenv("WAIT_DB_TCP_PROBE", "true").lower() in ("true", "yes", "1")
+TCP_TIMEOUT = float(os.getenv("WAIT_DB_TCP_TIMEOUT", 1))             # seconds per reachability probe
+
+
+def _tcp_address(db_url: str) -> tuple:
+    parsed = urlparse(db_url)
+    return parsed.hostname or "localhost", parsed.port or 5432
+
+
+def _tcp_reachable(address: tuple, timeout: float) -> float:
+    """Open and close a TCP connection; returns how long it took."""
+    started = time.monotonic()
+    with socket.create_connection(address, timeout=timeout):
+        pass
+    return time.monotonic() - started
+
+
+def _handshake(db_url: str, timeout: int) -> float:
+    """Full libpq connect (TLS + auth); returns how long it took."""
+    started = time.monotonic()
+    conn = psycopg2.connect(db_url, connect_timeout=timeout)
+    conn.close()
+    return time.monotonic() - started
+
+
+def _attempt(db_url: str, connect_timeout: int, tcp_timeout: float, timings: dict):
+    """
+    One connection attempt. With the TCP probe on, both run at once: a failed
+    probe ends the attempt immediately, otherwise the handshake decides.
+    """
+    if not tcp_timeout:
+        timings["handshake_seconds"] = round(_handshake(db_url, connect_timeout), 3)
+        return
+
+    # Own pool per attempt: an abandoned handshake (bounded by connect_timeout)
+    # finishes in the background without holding up the next attempt
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="wait-db")
+    try:
+        handshake = pool.submit(_handshake, db_url, connect_timeout)
+        probe = pool.submit(_tcp_reachable, _tcp_address(db_url), tcp_timeout)
+        done, _ = wait([probe, handshake], return_when=FIRST_COMPLETED)
+        if probe in done:
+            try:
+                timings.setdefault("tcp_seconds", round(probe.result(), 3))
+            except OSError as e:
+                raise psycopg2.OperationalError(f"TCP probe failed: {e}") from e
+        timings["handshake_seconds"] = round(handshake.result(), 3)
+    finally:
+        pool.shutdown(wait=False)
+
+
+def wait_for_database(db_url: str, max_retries: int = 5, retry_interval: int = 3,
+                      deadline: float = None, connect_timeout: int = CONNECT_TIMEOUT,
+                      tcp_probe: bool = TCP_PROBE) -> dict:
+    """
+    Wait until `db_url` accepts a connection, within `max_retries` attempts and
+    `deadline` seconds (default max_retries * retry_interval).
+    Returns {"attempts", "tcp_seconds", "handshake_seconds", "wait_seconds"}.
+    Raises RuntimeError when either limit is hit.
+    """
+    start = time.monotonic()
+    deadline = deadline if deadline is not None else max_retries * retry_interval
+    timings = {}
 
     for attempt in range(1, max_retries + 1):
+        remaining = deadline - (time.monotonic() - start)
         now_str = timer()
-        print(f"[WAIT_FOR_DB_CORE: {now_str}] Attempt {attempt}/{max_retries}")
+        print(f"[WAIT_FOR_DB_CORE: {now_str}] Attempt {attempt}/{max_retries} ({remaining:.1f}s left)")
         try:
-            conn = psycopg2.connect(db_url)
-            conn.close()
-            elapsed = time.time() - start
-            print(f"[WAIT_FOR_DB_CORE] Database ready after {elapsed:.2f}s")
-            return
+            _attempt(
+                db_url,
+                max(2, min(connect_timeout, int(remaining))),
+                min(TCP_TIMEOUT, remaining) if tcp_probe else 0,
+                timings,
+            )
+            timings["attempts"] = attempt
+            timings["wait_seconds"] = round(time.monotonic() - start, 3)
+            print(f"[WAIT_FOR_DB_CORE] Database ready after {timings['wait_seconds']:.2f}s {timings}")
+            return timings
         except psycopg2.OperationalError as e:
-            print(f"[WAIT_FOR_DB_CORE] DB not ready: {e}")
-            if attempt < max_retries:
-                time.sleep(retry_interval)
-            else:
-                elapsed = time.time() - start
-                raise RuntimeError(
-                    f"PostgreSQL unreachable after {max_retries} retries ({elapsed:.2f}s)"
-                )
+            print(f"[WAIT_FOR_DB_CORE] DB not ready: {str(e).strip()}")
+
+        delay = min(retry_interval, BACKOFF_INITIAL * (2 ** (attempt - 1))) * random.uniform(0.5, 1.0)
+        if attempt == max_retries or time.monotonic() - start + delay >= deadline:
+            break
+        time.sleep(delay)
+
+    elapsed = time.monotonic() - start
+    raise RuntimeError(
+        f"PostgreSQL unreachable after {attempt} attempts ({elapsed:.2f}s, deadline {deadline:.0f}s)"
+    )
@@ -0,0 +1,389 @@
+# app/weather/alerts.py
+import asyncio
+import fcntl
+import os
+import queue
+import random
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.message import EmailMessage
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+import crud
+from db import AsyncSessionLocal
+from sre.logger import logger
+from sre.metrics_service import (
+    subscriber_alert_stage_seconds,
+    subscriber_alert_subscriptions,
+    subscriber_alerts_total,
+)
+from weather.cache import normalize_city
+from weather.client import status_of
+from weather.service import WeatherService
+
+# Engine tuning (can be adjusted via env vars)
+SUBSCRIBER_ALERTS_ENABLED = os.getenv("SUBSCRIBER_ALERTS", "false").lower() in ("true", "yes", "1")
+ALERT_CYCLE_INTERVAL = float(os.getenv("SUBSCRIBER_ALERT_INTERVAL", 900))         # seconds between cycles
+CHUNK_SIZE = int(os.getenv("SUBSCRIBER_ALERT_CHUNK_SIZE", 5000))                  # preferences per query
+FETCH_CONCURRENCY = int(os.getenv("SUBSCRIBER_ALERT_FETCH_CONCURRENCY", 10))      # cities fetched at once
+BATCH_SIZE = int(os.getenv("SUBSCRIBER_ALERT_BATCH_SIZE", 500))                   # notifications per send
+DELIVERY_CONCURRENCY = int(os.getenv("SUBSCRIBER_ALERT_DELIVERY_CONCURRENCY", 4))  # pooled connections
+MAX_RETRIES = int(os.getenv("SUBSCRIBER_ALERT_MAX_RETRIES", 2))
+STATE_PATH = os.getenv("SUBSCRIBER_ALERT_STATE", "/tmp/edgepaas/subscriber_alerts.npy")
+LOCK_PATH = os.getenv("SUBSCRIBER_ALERT_LOCK", "/tmp/edgepaas/subscriber_alerts.lock")
+
+# Delivery channels: webhook first, else email (own sender, not the ops alert account)
+WEBHOOK_URL = os.getenv("SUBSCRIBER_ALERT_WEBHOOK_URL")
+EMAIL_FROM = os.environ.get("SUBSCRIBER_ALERT_EMAIL_FROM")
+EMAIL_PASS = os.environ.get("SUBSCRIBER_ALERT_EMAIL_PASS")
+SMTP_HOST = os.getenv("SUBSCRIBER_ALERT_SMTP_HOST", os.getenv("ALERT_SMTP_HOST", "smtp.server.com"))
+SMTP_PORT = int(os.getenv("SUBSCRIBER_ALERT_SMTP_PORT", os.getenv("ALERT_SMTP_PORT", 465)))
+
+# Rules, evaluated once per city
+HEAT_C = float(os.getenv("ALERT_RULE_HEAT_C", 35))     # temperature at or above
+FROST_C = float(os.getenv("ALERT_RULE_FROST_C", 0))    # temperature at or below
+CONDITIONS = [c.strip() for c in os.getenv("ALERT_RULE_CONDITIONS", "Thunderstorm,Tornado,Squall,Snow").split(",")
+              if c.strip()]
+RULES = ("heat", "frost", "condition")
+
+# Preference.alert_type → minimum seconds between alerts for that subscription
+CADENCE = {"daily": 86400, "weekly": 7 * 86400}
+
+
+@contextmanager
+def _stage(name: str, timings: dict):
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        timings[name] = time.monotonic() - start
+        subscriber_alert_stage_seconds.labels(stage=name).observe(timings[name])
+
+
+class SubscriberAlertEngine:
+    """
+    Alerts subscribed users about severe weather in their cities.
+    A cycle runs in four timed stages:
+    - load: every preference, in keyset-paged chunks, into NumPy arrays;
+      cities are deduplicated by cache key
+    - fetch: each distinct city once, through the weather service
+    - evaluate: rules per city, then broadcast to all subscriptions and
+      filtered by each one's cadence (`alert_type`), all vectorized
+    - deliver: one notification per user, sent in batches over pooled
+      webhook / SMTP connections
+    Last-sent times are kept per preference id and saved to STATE_PATH,
+    so restarts don't resend. Only the worker holding LOCK_PATH runs cycles.
+    """
+
+    def __init__(self, service: WeatherService, chunk_size: int = CHUNK_SIZE,
+                 fetch_concurrency: int = FETCH_CONCURRENCY, batch_size: int = BATCH_SIZE,
+                 delivery_concurrency: int = DELIVERY_CONCURRENCY, state_path: str = STATE_PATH):
+        self.service = service
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.delivery_concurrency = delivery_concurrency
+        self.state_path = state_path
+        self._slots = asyncio.Semaphore(fetch_concurrency)
+        self._last_sent = self._load_state()
+        self._lock_file = None
+        self._http = None
+        self._smtp = queue.LifoQueue()
+
+    # ---------------- Coordination ----------------
+    def acquire(self) -> bool:
+        """True once this process holds the engine lock (kept until exit)."""
+        if self._lock_file is not None:
+            return True
+        os.makedirs(os.path.dirname(LOCK_PATH), exist_ok=True)
+        lock_file = open(LOCK_PATH, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    @staticmethod
+    def channel():
+        if WEBHOOK_URL and WEBHOOK_URL.startswith("http"):
+            return "webhook"
+        if EMAIL_FROM and EMAIL_PASS:
+            return "email"
+        return None
+
+    # ---------------- Cycle ----------------
+    async def run_once(self) -> int:
+        """One alert cycle. Returns the number of users notified."""
+        channel = self.channel()
+        if channel is None:
+            logger.debug("Subscriber alerts skipped: no webhook or email configured")
+            return 0
+
+        timings = {}
+        with _stage("load", timings):
+            pref_ids, user_ids, city_idx, cadence, emails, cities = await self.load()
+        subscriber_alert_subscriptions.set(len(pref_ids))
+        if not len(pref_ids):
+            return 0
+
+        with _stage("fetch", timings):
+            temps, conditions = await self.fetch(cities)
+
+        with _stage("evaluate", timings):
+            now = time.time()
+            city_fired = self.city_rules(temps, conditions)
+            selected = self.evaluate(city_fired, pref_ids, city_idx, cadence, now)
+            notifications = self.notifications(selected, pref_ids, user_ids, city_idx, emails,
+                                               cities, temps, conditions, city_fired)
+
+        with _stage("deliver", timings):
+            sent = await asyncio.to_thread(self.deliver, channel, notifications)
+            if len(sent):
+                self._mark_sent(sent, now)
+
+        logger.info(
+            f"Subscriber alerts: {len(notifications)} users, {len(selected)}/{len(pref_ids)} subscriptions, "
+            f"{len(cities)} cities ("
+            + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()) + ")"
+        )
+        return len(notifications)
+
+    async def load(self):
+        """All preferences as parallel arrays, with cities deduplicated by cache key."""
+        pref_ids, user_ids, city_idx, cadence = [], [], [], []
+        emails, city_keys, cities = {}, {}, []
+
+        after_id = 0
+        async with AsyncSessionLocal() as db:
+            while True:
+                rows = await crud.get_subscriptions_page_async(db, after_id, self.chunk_size)
+                for pref_id, user_id, email, city, alert_type in rows:
+                    key = normalize_city(city)
+                    index = city_keys.get(key)
+                    if index is None:
+                        index = city_keys[key] = len(cities)
+                        cities.append(city)
+                    pref_ids.append(pref_id)
+                    user_ids.append(user_id)
+                    city_idx.append(index)
+                    cadence.append(CADENCE.get(alert_type, CADENCE["daily"]))
+                    emails[user_id] = email
+                if len(rows) < self.chunk_size:
+                    break
+                after_id = rows[-1][0]
+
+        return (
+            np.array(pref_ids, dtype=np.int64),
+            np.array(user_ids, dtype=np.int64),
+            np.array(city_idx, dtype=np.int64),
+            np.array(cadence, dtype=np.float64),
+            emails,
+            cities,
+        )
+
+    async def _fetch_one(self, city: str):
+        async with self._slots:
+            try:
+                payload = await self.service.get(city)
+            except Exception as e:
+                logger.warning(f"⚠️ Subscriber alerts: weather for {city} unavailable: {e}")
+                return np.nan, ""
+        if status_of(payload) != 200:
+            return np.nan, ""
+        return payload["main"]["temp"], payload["weather"][0]["main"]
+
+    async def fetch(self, cities: list):
+        """(temperature, condition) per city; nan / "" where the lookup failed."""
+        results = await asyncio.gather(*(self._fetch_one(city) for city in cities))
+        temps = np.array([temp for temp, _ in results], dtype=np.float64)
+        conditions = np.array([condition for _, condition in results], dtype=object)
+        return temps, conditions
+
+    @staticmethod
+    def city_rules(temps, conditions):
+        """Boolean matrix, one row per city, one column per rule in RULES."""
+        with np.errstate(invalid="ignore"):  # nan temperatures never fire
+            return np.column_stack((
+                temps >= HEAT_C,
+                temps <= FROST_C,
+                np.isin(conditions, CONDITIONS),
+            ))
+
+    def evaluate(self, city_fired, pref_ids, city_idx, cadence, now: float):
+        """Positions of subscriptions whose city fired a rule and whose cadence allows a send."""
+        fired = city_fired.any(axis=1)[city_idx]
+        due = now - self._last_sent_for(pref_ids) >= cadence
+        return np.flatnonzero(fired & due)
+
+    @staticmethod
+    def notifications(selected, pref_ids, user_ids, city_idx, emails, cities, temps, conditions, city_fired):
+        """One notification per user, listing every city that fired for them."""
+        if not len(selected):
+            return []
+        selected = selected[np.argsort(user_ids[selected], kind="stable")]
+        users = user_ids[selected]
+        groups = np.split(selected, np.flatnonzero(np.diff(users)) + 1)
+
+        out = []
+        for group in groups:
+            user_id = int(user_ids[group[0]])
+            alerts = []
+            for index in city_idx[group]:
+                alerts.append({
+                    "city": cities[index],
+                    "temperature": None if np.isnan(temps[index]) else float(temps[index]),
+                    "condition": conditions[index],
+                    "rules": [rule for rule, hit in zip(RULES, city_fired[index]) if hit],
+                })
+            out.append({
+                "user_id": user_id,
+                "email": emails[user_id],
+                "preference_ids": pref_ids[group].tolist(),
+                "alerts": alerts,
+            })
+        return out
+
+    # ---------------- Delivery ----------------
+    def deliver(self, channel: str, notifications: list):
+        """Send in batches of `batch_size` over pooled connections; returns the preference ids sent."""
+        batches = [notifications[i:i + self.batch_size] for i in range(0, len(notifications), self.batch_size)]
+        send = self._send_webhook if channel == "webhook" else self._send_emails
+
+        sent = []
+        with ThreadPoolExecutor(max_workers=self.delivery_concurrency,
+                                thread_name_prefix="subscriber-alerts") as pool:
+            for delivered, failed in pool.map(lambda b: self._with_retry(send, b), batches):
+                subscriber_alerts_total.labels(channel=channel, result="sent").inc(len(delivered))
+                subscriber_alerts_total.labels(channel=channel, result="failed").inc(len(failed))
+                sent.extend(pid for n in delivered for pid in n["preference_ids"])
+        return np.array(sent, dtype=np.int64)
+
+    @staticmethod
+    def _with_retry(send, batch: list):
+        """
+        (delivered, failed) notifications of `batch`. `send` appends each one it
+        handles, in order, to `delivered` or `rejected`, so a retry resumes after
+        the last one handled instead of re-sending the whole batch.
+        """
+        delivered, rejected = [], []
+        for attempt in range(MAX_RETRIES + 1):
+            pending = batch[len(delivered) + len(rejected):]
+            if not pending:
+                break
+            try:
+                send(pending, delivered, rejected)
+                break
+            except Exception as e:
+                left = len(batch) - len(delivered) - len(rejected)
+                logger.error(f"❌ Subscriber alert batch failed with {left} of {len(batch)} "
+                             f"left (attempt {attempt + 1}): {e}")
+                if attempt < MAX_RETRIES:
+                    time.sleep((2 ** attempt) * random.uniform(0.5, 1.5))
+        return delivered, rejected + batch[len(delivered) + len(rejected):]
+
+    def _session(self) -> requests.Session:
+        if self._http is None:
+            self._http = requests.Session()
+            self._http.mount("http://", HTTPAdapter(pool_maxsize=self.delivery_concurrency))
+            self._http.mount("https://", HTTPAdapter(pool_maxsize=self.delivery_concurrency))
+        return self._http
+
+    def _send_webhook(self, batch: list, delivered: list, rejected: list):
+        response = self._session().post(WEBHOOK_URL, json={"alerts": batch}, timeout=10)
+        response.raise_for_status()
+        delivered.extend(batch)
+
+    def _send_emails(self, batch: list, delivered: list, rejected: list):
+        try:
+            smtp = self._smtp.get_nowait()
+        except queue.Empty:
+            smtp = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=10)
+            smtp.login(EMAIL_FROM, EMAIL_PASS)
+
+        healthy = False
+        try:
+            for notification in batch:
+                try:
+                    smtp.send_message(self._email(notification))
+                except (smtplib.SMTPRecipientsRefused, ValueError) as e:
+                    # This message only (bad or refused address); the connection is fine
+                    logger.warning(f"⚠️ Subscriber alert to user {notification['user_id']} rejected: {e}")
+                    rejected.append(notification)
+                    continue
+                delivered.append(notification)
+            healthy = True
+        finally:
+            if healthy:
+                self._smtp.put(smtp)
+            else:
+                # Any other failure: drop the connection; the retry opens a fresh one
+                try:
+                    smtp.close()
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _email(notification: dict) -> EmailMessage:
+        lines = []
+        for alert in notification["alerts"]:
+            temperature = "N/A" if alert["temperature"] is None else f"{alert['temperature']:.1f}°C"
+            lines.append(f"- {alert['city']}: {alert['condition'] or 'unknown'}, {temperature} "
+                         f"({', '.join(alert['rules'])})")
+
+        msg = EmailMessage()
+        msg["Subject"] = "EdgePaaS weather alert"
+        msg["From"] = EMAIL_FROM
+        msg["To"] = notification["email"]
+        msg.set_content("Severe weather in your subscribed cities:\n" + "\n".join(lines))
+        return msg
+
+    def close(self):
+        while True:
+            try:
+                smtp = self._smtp.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                smtp.quit()
+            except Exception:
+                pass
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+
+    # ---------------- State ----------------
+    def _load_state(self):
+        try:
+            return np.load(self.state_path)
+        except (OSError, ValueError):
+            return np.zeros(0, dtype=np.float64)
+
+    def _last_sent_for(self, pref_ids):
+        """Last send time per subscription (0 = never), indexed by preference id."""
+        last = np.zeros(len(pref_ids), dtype=np.float64)
+        known = pref_ids < len(self._last_sent)
+        last[known] = self._last_sent[pref_ids[known]]
+        return last
+
+    def _mark_sent(self, pref_ids, now: float):
+        size = int(pref_ids.max()) + 1
+        if size > len(self._last_sent):
+            grown = np.zeros(max(size, 2 * len(self._last_sent)), dtype=np.float64)
+            grown[:len(self._last_sent)] = self._last_sent
+            self._last_sent = grown
+        self._last_sent[pref_ids] = now
+
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            tmp = f"{self.state_path}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, self._last_sent)
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Subscriber alert state not saved: {e}")
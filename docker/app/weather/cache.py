@@ -0,0 +1,123 @@
+# app/weather/cache.py
+import os
+import time
+import unicodedata
+from collections import OrderedDict
+
+from sre.metrics_service import (
+    weather_cache_hits_total,
+    weather_cache_misses_total,
+    weather_cache_stale_total,
+    weather_cache_evictions_total,
+)
+from weather.client import status_of
+
+# Cache tuning (can be adjusted via env vars)
+CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", 300))                # seconds, cod=200
+CACHE_NEGATIVE_TTL = float(os.getenv("WEATHER_CACHE_NEGATIVE_TTL", 60)) # seconds, cod=404
+CACHE_MAX_SIZE = int(os.getenv("WEATHER_CACHE_MAX_SIZE", 1024))       # entries
+CACHE_STALE_TTL = float(os.getenv("WEATHER_CACHE_STALE_TTL", 600))    # seconds past expiry, 0 disables
+
+
+def normalize_city(city: str) -> str:
+    """
+    Cache key for a city name.
+    "  São  Paulo " and "sao paulo" map to the same key.
+    """
+    decomposed = unicodedata.normalize("NFKD", city)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+class WeatherCache:
+    """
+    In-process TTL + LRU cache of OpenWeather payloads.
+    Only definitive answers are cached: 200 for CACHE_TTL,
+    404 for CACHE_NEGATIVE_TTL. Anything else is never stored.
+    Expired 200s are kept for CACHE_STALE_TTL so they can be
+    served while a refresh runs (stale-while-revalidate).
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL, negative_ttl: float = CACHE_NEGATIVE_TTL,
+                 max_size: int = CACHE_MAX_SIZE, stale_ttl: float = CACHE_STALE_TTL):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # key -> (payload, expires_at, stale_until)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl_for(self, payload: dict):
+        status = status_of(payload)
+        if status == 200:
+            return self.ttl
+        if status == 404:
+            return self.negative_ttl
+        return None
+
+    def stale_ttl_for(self, payload: dict) -> float:
+        # Only good answers may be served stale
+        return self.stale_ttl if status_of(payload) == 200 else 0
+
+    def get(self, key: str):
+        """Fresh payload for `key`, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            weather_cache_misses_total.inc()
+            return None
+
+        payload, expires_at, stale_until = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            weather_cache_stale_total.inc()
+            weather_cache_misses_total.inc()
+            if stale_until <= now:
+                del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        weather_cache_hits_total.inc()
+        return payload
+
+    def get_stale(self, key: str):
+        """Expired payload still inside its stale window, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        payload, expires_at, stale_until = entry
+        if expires_at <= time.monotonic() < stale_until:
+            return payload
+        return None
+
+    def expires_in(self, key: str):
+        """Seconds until `key` expires (negative once expired), or None if absent."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry[1] - time.monotonic()
+
+    def set(self, key: str, payload: dict, ttl: float = None, stale_ttl: float = None):
+        """
+        Store `payload`. `ttl` / `stale_ttl` override the status-based
+        defaults, e.g. to keep the remaining lifetime of a shared entry.
+        """
+        if ttl is None:
+            ttl = self.ttl_for(payload)
+            if ttl is None:
+                return
+        if stale_ttl is None:
+            stale_ttl = self.stale_ttl_for(payload)
+
+        expires_at = time.monotonic() + ttl
+        stale_until = expires_at + stale_ttl
+        self._entries[key] = (payload, expires_at, stale_until)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            weather_cache_evictions_total.inc()
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,109 @@
+# app/weather/client.py
+import asyncio
+import os
+import random
+import time
+
+import httpx
+
+from sre.metrics_service import (
+    weather_upstream_pool_size,
+    weather_upstream_in_flight,
+    weather_upstream_wait_seconds,
+    weather_upstream_retries_total,
+)
+
+OPENWEATHER_URL = os.getenv("OPENWEATHER_URL", "https://api.openweathermap.org/data/2.5/weather")
+
+# Pool / timeout / retry tuning (can be adjusted via env vars)
+POOL_SIZE = int(os.getenv("WEATHER_POOL_SIZE", 20))               # keep-alive connections
+MAX_IN_FLIGHT = int(os.getenv("WEATHER_MAX_IN_FLIGHT", POOL_SIZE)) # concurrent upstream calls
+CONNECT_TIMEOUT = float(os.getenv("WEATHER_CONNECT_TIMEOUT", 2))   # seconds
+READ_TIMEOUT = float(os.getenv("WEATHER_READ_TIMEOUT", 5))         # seconds
+MAX_RETRIES = int(os.getenv("WEATHER_MAX_RETRIES", 2))
+BACKOFF_BASE = float(os.getenv("WEATHER_BACKOFF_BASE", 0.2))       # seconds
+BACKOFF_MAX = float(os.getenv("WEATHER_BACKOFF_MAX", 2))           # seconds
+
+# Upstream statuses worth retrying; anything else is a final answer
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def status_of(payload: dict) -> int:
+    """OpenWeather sends `cod` as int on success and as str on errors."""
+    try:
+        return int(payload.get("cod", 500))
+    except (TypeError, ValueError):
+        return 500
+
+
+class WeatherClient:
+    """
+    Async OpenWeather client.
+    One shared keep-alive pool, per-request timeouts,
+    bounded concurrency and retry with jittered backoff.
+    """
+
+    def __init__(self, api_key: str, base_url: str = OPENWEATHER_URL):
+        self.api_key = api_key
+        self.base_url = base_url
+        self._client = None
+        self._slots = asyncio.Semaphore(MAX_IN_FLIGHT)
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=POOL_SIZE,
+                    max_keepalive_connections=POOL_SIZE,
+                ),
+            )
+            weather_upstream_pool_size.set(POOL_SIZE)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(self, city: str) -> dict:
+        """
+        Return the raw OpenWeather payload for `city`.
+        Transport failures surface as `{"cod": 503|504, "message": ...}`
+        so callers handle them like any other upstream status.
+        """
+        await self.start()
+
+        wait_start = time.monotonic()
+        async with self._slots:
+            weather_upstream_wait_seconds.observe(time.monotonic() - wait_start)
+            weather_upstream_in_flight.inc()
+            try:
+                return await self._fetch_with_retry(city)
+            finally:
+                weather_upstream_in_flight.dec()
+
+    async def _fetch_with_retry(self, city: str) -> dict:
+        params = {"q": city, "appid": self.api_key, "units": "metric"}
+        payload = None
+
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                resp = await self._client.get(self.base_url, params=params)
+                payload = resp.json()
+                if resp.status_code not in RETRY_STATUSES:
+                    return payload
+            except httpx.TimeoutException as e:
+                payload = {"cod": 504, "message": f"OpenWeather timeout: {e}"}
+            except (httpx.HTTPError, ValueError) as e:
+                payload = {"cod": 503, "message": f"OpenWeather unavailable: {e}"}
+
+            if attempt < MAX_RETRIES:
+                weather_upstream_retries_total.inc()
+                await asyncio.sleep(self._backoff(attempt))
+
+        return payload
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
@@ -0,0 +1,102 @@
+# app/weather/prefetch.py
+import asyncio
+import fcntl
+import os
+import time
+
+import crud
+from db import AsyncSessionLocal
+from sre.logger import logger
+from sre.metrics_service import weather_prefetch_batch_seconds, weather_prefetch_lag_seconds
+from weather.cache import normalize_city
+from weather.service import WeatherService
+
+# Prefetch tuning (can be adjusted via env vars)
+PREFETCH_ENABLED = os.getenv("WEATHER_PREFETCH", "true").lower() in ("true", "yes", "1")
+PREFETCH_INTERVAL = float(os.getenv("WEATHER_PREFETCH_INTERVAL", 60))      # seconds between cycles
+PREFETCH_LEAD = float(os.getenv("WEATHER_PREFETCH_LEAD", 90))              # refresh this long before expiry
+PREFETCH_TOP_N = int(os.getenv("WEATHER_PREFETCH_TOP_N", 50))              # most-subscribed cities
+PREFETCH_BATCH_SIZE = int(os.getenv("WEATHER_PREFETCH_BATCH_SIZE", 10))
+PREFETCH_CONCURRENCY = int(os.getenv("WEATHER_PREFETCH_CONCURRENCY", 5))
+PREFETCH_LOCK_PATH = os.getenv("WEATHER_PREFETCH_LOCK", "/tmp/edgepaas/weather_prefetch.lock")
+
+
+class WeatherPrefetcher:
+    """
+    Keeps subscribed cities warm.
+    Each cycle reads the top-N cities from `Preference.city` and refreshes
+    the ones whose cache entry is missing or expires within PREFETCH_LEAD,
+    batch by batch with at most PREFETCH_CONCURRENCY upstream calls at once.
+    PREFETCH_LEAD should exceed PREFETCH_INTERVAL so entries are refreshed
+    before they expire rather than after.
+    With a shared cache, only the worker holding PREFETCH_LOCK_PATH
+    prefetches; the others pick the fresh entries up from the shared tier.
+    """
+
+    def __init__(self, service: WeatherService, top_n: int = PREFETCH_TOP_N,
+                 lead: float = PREFETCH_LEAD, batch_size: int = PREFETCH_BATCH_SIZE,
+                 concurrency: int = PREFETCH_CONCURRENCY):
+        self.service = service
+        self.top_n = top_n
+        self.lead = lead
+        self.batch_size = batch_size
+        self._slots = asyncio.Semaphore(concurrency)
+        self._lock_file = None
+
+    def acquire(self) -> bool:
+        """True once this process holds the prefetch lock (kept until exit)."""
+        if self._lock_file is not None:
+            return True
+        os.makedirs(os.path.dirname(PREFETCH_LOCK_PATH), exist_ok=True)
+        lock_file = open(PREFETCH_LOCK_PATH, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def should_run(self) -> bool:
+        """Without a shared cache every worker warms its own; with one, a single worker does."""
+        return self.service.shared is None or self.acquire()
+
+    async def subscribed_cities(self) -> list:
+        """Top-N cities, deduplicated by cache key."""
+        async with AsyncSessionLocal() as db:
+            cities = await crud.get_top_cities_async(db, self.top_n)
+
+        unique = {}
+        for city in cities:
+            unique.setdefault(normalize_city(city), city)
+        return list(unique.values())
+
+    def due(self, cities: list) -> list:
+        due = []
+        for city in cities:
+            remaining = self.service.cache.expires_in(normalize_city(city))
+            if remaining is None or remaining < self.lead:
+                due.append(city)
+        return due
+
+    async def _refresh(self, city: str):
+        async with self._slots:
+            remaining = self.service.cache.expires_in(normalize_city(city))
+            if remaining is not None:
+                weather_prefetch_lag_seconds.observe(max(0, self.lead - remaining))
+            await self.service.refresh(city)
+
+    async def run_once(self) -> int:
+        """One prefetch cycle. Returns the number of cities refreshed."""
+        cities = await self.subscribed_cities()
+        due = self.due(cities)
+
+        for i in range(0, len(due), self.batch_size):
+            batch = due[i:i + self.batch_size]
+            start = time.monotonic()
+            await asyncio.gather(*(self._refresh(city) for city in batch))
+            weather_prefetch_batch_seconds.observe(time.monotonic() - start)
+
+        if due:
+            logger.debug(f"Weather prefetch refreshed {len(due)}/{len(cities)} subscribed cities")
+        return len(due)
@@ -0,0 +1,69 @@
+# app/weather/service.py
+import time
+
+from sre.metrics_service import weather_stale_served_total
+from weather.cache import WeatherCache, normalize_city
+from weather.client import WeatherClient
+from weather.shared_cache import SharedWeatherCache
+from weather.singleflight import SingleFlight
+
+
+class WeatherService:
+    """
+    Single entry point for weather lookups.
+    Cache first, OpenWeather on a miss.
+    Concurrent misses for one city share a single upstream call,
+    and an expired entry is served while one background refresh runs.
+    With a `shared` store, the in-process cache is a warm L1 in front
+    of a host-wide L2 that every worker reads and writes.
+    """
+
+    def __init__(self, client: WeatherClient, cache: WeatherCache = None,
+                 shared: SharedWeatherCache = None):
+        self.client = client
+        self.cache = cache if cache is not None else WeatherCache()
+        self.shared = shared
+        self.flights = SingleFlight()
+
+    async def get(self, city: str) -> dict:
+        key = normalize_city(city)
+        payload = self.cache.get(key)
+        if payload is not None:
+            return payload
+
+        stale = self.cache.get_stale(key)
+        if self.shared is not None:
+            row = await self.shared.get_async(key)
+            if row is not None:
+                payload, expires_at, stale_until = row
+                remaining = expires_at - time.time()
+                if remaining > 0:
+                    self.cache.set(key, payload, ttl=remaining, stale_ttl=stale_until - expires_at)
+                    return payload
+                if stale is None:
+                    stale = payload
+
+        if stale is not None:
+            weather_stale_served_total.inc()
+            self.flights.start(key, lambda: self._load(key, city))
+            return stale
+
+        return await self.flights.do(key, lambda: self._load(key, city))
+
+    async def refresh(self, city: str) -> dict:
+        """Force an upstream fetch for `city`, still coalesced with live lookups."""
+        key = normalize_city(city)
+        return await self.flights.do(key, lambda: self._load(key, city))
+
+    async def _load(self, key: str, city: str) -> dict:
+        payload = await self.client.fetch(city)
+        self.cache.set(key, payload)
+        if self.shared is not None:
+            ttl = self.cache.ttl_for(payload)
+            if ttl is not None:
+                await self.shared.set_async(key, payload, ttl, self.cache.stale_ttl_for(payload))
+        return payload
+
+    def close(self):
+        if self.shared is not None:
+            self.shared.close()
@@ -0,0 +1,122 @@
+# app/weather/shared_cache.py
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sre.logger import logger
+from sre.metrics_service import weather_shared_cache_hits_total, weather_shared_cache_errors_total
+
+# Shared cache tuning (can be adjusted via env vars)
+SHARED_CACHE_ENABLED = os.getenv("WEATHER_SHARED_CACHE", "false").lower() in ("true", "yes", "1")
+SHARED_CACHE_PATH = os.getenv("WEATHER_SHARED_CACHE_PATH", "/tmp/edgepaas/weather_cache.db")
+SHARED_CACHE_MAX_SIZE = int(os.getenv("WEATHER_SHARED_CACHE_MAX_SIZE", 10000))  # rows
+SHARED_CACHE_PURGE_EVERY = int(os.getenv("WEATHER_SHARED_CACHE_PURGE_EVERY", 100))  # writes
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weather_cache (
+    key         TEXT PRIMARY KEY,
+    payload     TEXT NOT NULL,
+    expires_at  REAL NOT NULL,
+    stale_until REAL NOT NULL
+)
+"""
+
+
+class SharedWeatherCache:
+    """
+    Host-wide weather cache shared by every uvicorn worker.
+    Backed by a WAL-mode SQLite file next to the fallback DB.
+    Times are wall-clock epochs so all processes agree on expiry;
+    expired rows are filtered in SQL, so a reader never sees one.
+    Eviction: purge rows past their stale window, then drop the
+    soonest-expiring rows until the table fits SHARED_CACHE_MAX_SIZE.
+    Every failure is logged and swallowed — the shared tier is an
+    optimisation, never a dependency.
+    """
+
+    def __init__(self, path: str = SHARED_CACHE_PATH, max_size: int = SHARED_CACHE_MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self._conn = None
+        self._writes = 0
+        # sqlite3 calls block (up to the busy timeout under write contention);
+        # async callers go through this one thread, never the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-weather-cache")
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str):
+        """
+        Return `(payload, expires_at, stale_until)` for a row still inside
+        its stale window, or None.
+        """
+        try:
+            row = self._connect().execute(
+                "SELECT payload, expires_at, stale_until FROM weather_cache "
+                "WHERE key = ? AND stale_until > ?",
+                (key, time.time()),
+            ).fetchone()
+        except sqlite3.Error as e:
+            weather_shared_cache_errors_total.inc()
+            logger.warning(f"Shared weather cache read failed ⚠️: {e}")
+            return None
+
+        if row is None:
+            return None
+        weather_shared_cache_hits_total.inc()
+        return json.loads(row[0]), row[1], row[2]
+
+    def set(self, key: str, payload: dict, ttl: float, stale_ttl: float):
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO weather_cache (key, payload, expires_at, stale_until) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(payload), now + ttl, now + ttl + stale_ttl),
+            )
+            self._writes += 1
+            if self._writes % SHARED_CACHE_PURGE_EVERY == 0:
+                self.purge()
+        except sqlite3.Error as e:
+            weather_shared_cache_errors_total.inc()
+            logger.warning(f"Shared weather cache write failed ⚠️: {e}")
+
+    async def get_async(self, key: str):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.get, key)
+
+    async def set_async(self, key: str, payload: dict, ttl: float, stale_ttl: float):
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.set, key, payload, ttl, stale_ttl)
+
+    def purge(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM weather_cache WHERE stale_until <= ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM weather_cache WHERE key IN ("
+                "  SELECT key FROM weather_cache ORDER BY expires_at "
+                "  LIMIT max(0, (SELECT count(*) FROM weather_cache) - ?))",
+                (self.max_size,),
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
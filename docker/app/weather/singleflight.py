@@ -0,0 +1,33 @@
+# app/weather/singleflight.py
+import asyncio
+
+from sre.metrics_service import weather_coalesced_waiters_total
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one task.
+    The first caller starts the work; everyone else awaits its result.
+    The task is shielded so one caller disconnecting never cancels
+    the upstream call the others are waiting on.
+    """
+
+    def __init__(self):
+        self._flights = {}  # key -> asyncio.Task
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    def start(self, key: str, fn) -> asyncio.Task:
+        """Return the running task for `key`, starting `fn()` if there is none."""
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        return task
+
+    async def do(self, key: str, fn):
+        if key in self._flights:
+            weather_coalesced_waiters_total.inc()
+        return await asyncio.shield(self.start(key, fn))